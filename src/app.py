@@ -1,161 +1,121 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from flask_cors import CORS
-from flask import Flask, request, jsonify
-from transformers import MobileBertTokenizer, MobileBertForSequenceClassification
-import torch
-from bs4 import BeautifulSoup, NavigableString, Tag
-import requests
-import re
+from flask import Flask, Response, request, jsonify
+import config
+import metrics
+import service
+from service import cache, scheduler, reputation, reputation_verdict, url_verdict, fetch_page, html_from_request, cached_verdict, classify_html, verdict_payload
 
 app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = config.MAX_REQUEST_BYTES
 CORS(app)
 
-# Load the trained model and tokenizer
-model = MobileBertForSequenceClassification.from_pretrained('D://PTIT/Datn/Code/anti-phishing/src/model')
-tokenizer = MobileBertTokenizer.from_pretrained('D://PTIT/Datn/Code/anti-phishing/src/model')
-
-TARGET_TAGS = {
-    "a", "form", "input", "button", "iframe", "script", "title", "meta",
-    "img", "label", "p", "header", "footer", "ul", "ol", "li", "noscript"
-}
-
-def clean_text(text: str) -> str:
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
-
-def fetch_html(url):
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # 4xx/5xx errors
-        return response.text
-    except requests.RequestException as e:
-        print(f"Error fetching URL {url}: {e}")
-        return None
-
-def generate_text_representation(html_content):
-    soup = BeautifulSoup(html_content, "lxml")
-
-    for script in soup(["style"]):
-        script.decompose()
-
-    parsed = []
-
-    def traverse(node):
-        if isinstance(node, NavigableString):
-            return
-
-        if isinstance(node, Tag):
-            tag = node.name.lower()
-
-            if tag in TARGET_TAGS:
-
-                # A
-                if tag == "a":
-                    text = clean_text(node.get_text())
-                    href = node.get("href", "No URL provided")
-                    parsed.append(f'LINK: {{ text: "{text or "<EMPTY>"}", href: "{href}" }}')
-
-                # FORM
-                elif tag == "form":
-                    action = node.get("action")
-                    method = node.get("method")
-                    parsed.append(f'FORM: {{ action: "{action or ""}", method: "{method or ""}" }}')
-                
-                elif tag == "label":
-                    for_value = node.get("for")
-                    text = clean_text(node.get_text())
-                    parsed.append(f'LABEL: {{ for: "{for_value or ""}", "text": "{text or "<EMPTY>"}" }}')
-
-                # INPUT / CHECKBOX
-                elif tag == "input":
-                    input_type = node.get("type")
-                    name = node.get("name")
-                    placeholder = node.get("placeholder")
-
-                    if input_type == "checkbox":
-                        label_element = node.find_next('label')
-                        label_text = clean_text(label_element.get_text()) if label_element else "<EMPTY>"
-                        parsed.append(f'CHECKBOX: {{ label: "{label_text}", input: {{ type: "checkbox", name: "{name or ""}", placeholder: "{placeholder or ""}" }} }}')
-                    else:
-                        parsed.append(f'INPUT: {{ type: "{input_type or ""}", name: "{name or ""}", placeholder: "{placeholder or ""}" }}')
-
-                # BUTTON
-                elif tag == "button":
-                    text = clean_text(node.get_text())
-                    parsed.append(f'BUTTON: {{ text: "{text or "<EMPTY>"}" }}')
-
-                # IFRAME
-                elif tag == "iframe":
-                    src = node.get("src")
-                    parsed.append(f'IFRAME: {{ src: "{src or ""} }}')
-
-                # SCRIPT
-                elif tag == "script":
-                    src = node.get("src")
-                    if src:
-                        parsed.append(f'SCRIPT: {{ src: "{src}" }}')
-                    else:
-                        parsed.append(f'SCRIPT: {{ <SCRIPT INLINE> }}')
-
-                # META
-                elif tag == "meta":
-                    name = node.get("name") or node.get("property")
-                    content = node.get("content")
-                    parsed.append(f'META: {{ name: "{name or ""}", content: "{content or "<EMPTY>"}" }}')
-                        
-                # IMG
-                elif tag == "img":
-                    src = node.get("src")
-                    alt = node.get("alt")
-                    parsed.append(f'IMG: {{ src: "{src or ""}", alt: "{alt or "<EMPTY>"}" }}')
-
-                # TEXT TAGS
-                elif tag in {"p", "ul", "ol", "li", "header", "noscript", "title"}:
-                    text = clean_text(node.get_text())
-                    parsed.append(f'{tag.upper()}: {{ text: "{text or "<EMPTY>"}" }}')
-
-            for child in node.children:
-                traverse(child)
-
-    traverse(soup)
-    return "\n".join(parsed)
-
-def predict_phishing(html_content):
-    processed_text = generate_text_representation(html_content)
-    
-    inputs = tokenizer.encode_plus(
-        processed_text,
-        add_special_tokens=True,
-        max_length=128,
-        return_token_type_ids=False,
-        padding='max_length',
-        truncation=True,
-        return_attention_mask=True,
-        return_tensors='pt'
-    )
-
-    model.eval()
-    with torch.no_grad():
-        outputs = model(**inputs)
-        logits = outputs.logits
-        predicted_class = torch.argmax(logits, dim=-1)
-
-    return predicted_class.item()
+# Page downloads of /check_urls
+fetch_pool = ThreadPoolExecutor(max_workers=config.BULK_FETCH_CONCURRENCY, thread_name_prefix="bulk-fetch")
 
 @app.route('/check_url', methods=['POST'])
 def check_url():
-    data = request.json
-    url = data.get('url', '')
-    html_content = fetch_html(url)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'result': 'Invalid JSON body'}), 400
+    timing = service.begin_request()
+    url = data.get('url')
+    if not isinstance(url, str) or not url.strip():
+        service.finish_request(timing, '', 'error')
+        return jsonify({'result': 'Missing url'}), 400
+
+    verdict = reputation_verdict(url)
+    if verdict is not None:
+        service.finish_request(timing, url, verdict['result'], source='reputation')
+        return jsonify(verdict)
+
+    verdict = cached_verdict(url)
+    if verdict is not None:
+        service.finish_request(timing, url, verdict['result'], source='cache')
+        return jsonify(verdict_payload(verdict))
+
+    verdict = url_verdict(url)
+    if verdict is not None:
+        service.finish_request(timing, url, verdict['result'], source='url_model')
+        return jsonify(verdict_payload(verdict))
+
+    if not service.wait_ready(config.READY_WAIT_SECONDS):
+        service.finish_request(timing, url, 'not_ready')
+        return jsonify({'result': 'Model is not ready', **service.health()}), 503
+
+    html_content = html_from_request(data)
+    fetch_metrics = None
+    if html_content is None:
+        fetch_result = fetch_page(url)
+        html_content = fetch_result.html
+        fetch_metrics = fetch_result.metrics()
     
     if html_content:
-        prediction = predict_phishing(html_content)
-        label_map = {0: 'benign', 1: 'phishing'}
-        result = label_map[prediction]
-        return jsonify({'result': result})
+        try:
+            verdict = classify_html(url, html_content, from_client=fetch_metrics is None)
+        except Exception:
+            service.finish_request(timing, url, 'error')
+            raise
+        service.finish_request(timing, url, verdict['result'])
+        return jsonify({**verdict_payload(verdict), 'fetch': fetch_metrics})
     else:
-        return jsonify({'result': 'Error fetching HTML content'}), 400
+        service.finish_request(timing, url, 'fetch_error')
+        return jsonify({'result': 'Error fetching HTML content', 'fetch': fetch_metrics}), 400
+
+@app.route('/check_urls', methods=['POST'])
+def check_urls():
+    started = time.perf_counter()
+    items, error = service.bulk_items(request.get_json(silent=True))
+    if error:
+        return jsonify({'result': error}), 400
+
+    timings = {}
+    start = time.perf_counter()
+    pending = service.bulk_prefilter(items)
+    timings['prefilter_ms'] = service.elapsed_ms(start)
+    if pending and not service.wait_ready(config.READY_WAIT_SECONDS):
+        service.bulk_not_ready(pending)
+        pending = []
+
+    start = time.perf_counter()
+    list(fetch_pool.map(service.bulk_fetch, [item for item in pending if item['html'] is None]))
+    timings['fetch_ms'] = service.elapsed_ms(start)
+
+    start = time.perf_counter()
+    service.bulk_score(pending)
+    timings['score_ms'] = service.elapsed_ms(start)
+    return jsonify(service.bulk_response(items, started, timings))
+
+@app.route('/health', methods=['GET'])
+def health():
+    status = service.health()
+    return jsonify(status), 200 if status['status'] == 'ready' else 503
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    if cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **cache.stats()})
+
+@app.route('/reputation_stats', methods=['GET'])
+def reputation_stats():
+    if reputation is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **reputation.stats()})
+
+@app.route('/scheduler_stats', methods=['GET'])
+def scheduler_stats():
+    if scheduler is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **scheduler.stats()})
 
 if __name__ == '__main__':
-    app.run(port=5024)
+    service.start()
+    app.run(host=config.SERVING_HOST, port=config.SERVING_PORT, threaded=True)
 
 
@@ -0,0 +1,232 @@
+import json
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import config
+import metrics
+import service
+from service import cache, scheduler, reputation, reputation_verdict, url_verdict, create_async_client, fetch_page_async, html_from_request, cached_verdict, classify_html, verdict_payload
+
+# Page downloads run on the event loop; extraction and the model run on these threads
+executor = ThreadPoolExecutor(max_workers=config.INFERENCE_THREADS, thread_name_prefix="inference")
+client = None
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+    (b"access-control-allow-headers", b"Content-Type"),
+]
+
+def get_client():
+    global client
+    if client is None:
+        client = create_async_client()
+    return client
+
+async def read_body(receive, limit):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if len(body) > limit:
+            return None
+        if not message.get("more_body"):
+            return bytes(body)
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ] + CORS_HEADERS,
+    })
+    await send({"type": "http.response.body", "body": body})
+
+def in_executor(function, *args):
+    # run_in_executor does not carry context variables over; the stage timings of the request do
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(executor, context.run, function, *args)
+
+async def check_url(data):
+    timing = service.begin_request()
+    url = data.get('url')
+    if not isinstance(url, str) or not url.strip():
+        service.finish_request(timing, '', 'error')
+        return {'result': 'Missing url'}, 400
+
+    verdict = reputation_verdict(url)
+    if verdict is not None:
+        service.finish_request(timing, url, verdict['result'], source='reputation')
+        return verdict, 200
+
+    verdict = cached_verdict(url)
+    if verdict is not None:
+        service.finish_request(timing, url, verdict['result'], source='cache')
+        return verdict_payload(verdict), 200
+
+    verdict = url_verdict(url)
+    if verdict is not None:
+        service.finish_request(timing, url, verdict['result'], source='url_model')
+        return verdict_payload(verdict), 200
+
+    loop = asyncio.get_running_loop()
+    ready = await loop.run_in_executor(None, service.wait_ready, config.READY_WAIT_SECONDS)
+    if not ready:
+        service.finish_request(timing, url, 'not_ready')
+        return {'result': 'Model is not ready', **service.health()}, 503
+
+    html_content = None
+    fetch_metrics = None
+    if data.get('html') or data.get('html_gzip'):
+        html_content = await in_executor(html_from_request, data)
+    if html_content is None:
+        fetch_result = await fetch_page_async(get_client(), url, executor)
+        html_content = fetch_result.html
+        fetch_metrics = fetch_result.metrics()
+
+    if html_content:
+        try:
+            verdict = await in_executor(classify_html, url, html_content, fetch_metrics is None)
+        except Exception:
+            service.finish_request(timing, url, 'error')
+            raise
+        service.finish_request(timing, url, verdict['result'])
+        return {**verdict_payload(verdict), 'fetch': fetch_metrics}, 200
+    else:
+        service.finish_request(timing, url, 'fetch_error')
+        return {'result': 'Error fetching HTML content', 'fetch': fetch_metrics}, 400
+
+async def check_urls(data):
+    started = time.perf_counter()
+    items, error = service.bulk_items(data)
+    if error:
+        return {'result': error}, 400
+
+    timings = {}
+    start = time.perf_counter()
+    pending = await in_executor(service.bulk_prefilter, items)
+    timings['prefilter_ms'] = service.elapsed_ms(start)
+    if pending:
+        ready = await asyncio.get_running_loop().run_in_executor(None, service.wait_ready, config.READY_WAIT_SECONDS)
+        if not ready:
+            service.bulk_not_ready(pending)
+            pending = []
+
+    # All downloads share the pooled client, at most BULK_FETCH_CONCURRENCY at a time
+    start = time.perf_counter()
+    limit = asyncio.Semaphore(config.BULK_FETCH_CONCURRENCY)
+
+    async def fetch(item):
+        async with limit:
+            service.bulk_fetched(item, await fetch_page_async(get_client(), item['url'], executor))
+
+    await asyncio.gather(*(fetch(item) for item in pending if item['html'] is None))
+    timings['fetch_ms'] = service.elapsed_ms(start)
+
+    start = time.perf_counter()
+    await in_executor(service.bulk_score, pending)
+    timings['score_ms'] = service.elapsed_ms(start)
+    return service.bulk_response(items, started, timings), 200
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            service.start()
+            get_client()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if client is not None:
+                await client.aclose()
+            executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    method = scope["method"]
+    path = scope["path"]
+
+    if method == "OPTIONS":
+        await send({"type": "http.response.start", "status": 204, "headers": CORS_HEADERS})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    if path == "/check_url" and method == "POST":
+        body = await read_body(receive, config.MAX_REQUEST_BYTES)
+        if body is None:
+            await send_json(send, {'result': 'Request too large'}, 413)
+            return
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            await send_json(send, {'result': 'Invalid JSON body'}, 400)
+            return
+        payload, status = await check_url(data)
+        await send_json(send, payload, status)
+
+    elif path == "/check_urls" and method == "POST":
+        body = await read_body(receive, config.MAX_REQUEST_BYTES)
+        if body is None:
+            await send_json(send, {'result': 'Request too large'}, 413)
+            return
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        payload, status = await check_urls(data)
+        await send_json(send, payload, status)
+
+    elif path == "/health" and method == "GET":
+        status = service.health()
+        await send_json(send, status, 200 if status['status'] == 'ready' else 503)
+
+    elif path == "/metrics" and method == "GET":
+        body = metrics.render().encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", metrics.CONTENT_TYPE.encode("ascii")),
+                (b"content-length", str(len(body)).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    elif path == "/cache_stats" and method == "GET":
+        if cache is None:
+            await send_json(send, {'enabled': False})
+        else:
+            await send_json(send, {'enabled': True, **cache.stats()})
+
+    elif path == "/reputation_stats" and method == "GET":
+        if reputation is None:
+            await send_json(send, {'enabled': False})
+        else:
+            await send_json(send, {'enabled': True, **reputation.stats()})
+
+    elif path == "/scheduler_stats" and method == "GET":
+        if scheduler is None:
+            await send_json(send, {'enabled': False})
+        else:
+            await send_json(send, {'enabled': True, **scheduler.stats()})
+
+    else:
+        await send_json(send, {'result': 'Not found'}, 404)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host=config.SERVING_HOST, port=config.SERVING_PORT)
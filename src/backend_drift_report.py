@@ -0,0 +1,87 @@
+import os
+import time
+import argparse
+import numpy as np
+import psutil
+from inference import BACKENDS, load_backend, softmax
+from tokenization import load_tokenizer, encode_batch
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL = os.path.join(SRC_DIR, "model")
+DEFAULT_BENIGN_DIR = "D://PTIT/Datn/Code/anti-phishing/data_for_prediction/benign_samples"
+DEFAULT_PHISHING_DIR = "D://PTIT/Datn/Code/anti-phishing/data_for_prediction/phishing_samples"
+DEFAULT_OUTPUT = os.path.join(SRC_DIR, "backend_drift_report.txt")
+
+def read_file(file_path):
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+def load_samples(folder, label, limit):
+    files = sorted(f for f in os.listdir(folder) if f.endswith(".txt"))[:limit]
+    return [(read_file(os.path.join(folder, f)), label) for f in files]
+
+def rss_mb():
+    return psutil.Process().memory_info().rss / 1048576
+
+def run_backend(backend, tokenizer, texts, batch_size):
+    probs = []
+    elapsed = 0.0
+    for offset in range(0, len(texts), batch_size):
+        inputs = encode_batch(tokenizer, texts[offset:offset + batch_size], return_tensors=backend.tensor_type)
+        start = time.perf_counter()
+        logits = backend.logits(inputs)
+        elapsed += time.perf_counter() - start
+        probs.append(softmax(logits))
+    return np.concatenate(probs), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare every inference backend with the fp32 PyTorch model on the prediction dataset.')
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--onnx-dir', help='Folder written by export_model.py (default: model_onnx next to the model).')
+    parser.add_argument('--benign-dir', default=DEFAULT_BENIGN_DIR)
+    parser.add_argument('--phishing-dir', default=DEFAULT_PHISHING_DIR)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--limit', type=int, default=1000, help='Samples per class.')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    samples = load_samples(args.benign_dir, 0, args.limit) + load_samples(args.phishing_dir, 1, args.limit)
+    texts = [text for text, _ in samples]
+    labels = np.array([label for _, label in samples])
+    tokenizer = load_tokenizer(args.model)
+
+    # fp32 PyTorch is the reference every other backend is compared with
+    backends = ["torch"] + [name for name in args.backends if name != "torch"]
+    reference = None
+    lines = [f"Samples: {len(samples)} ({int((labels == 0).sum())} benign, {int((labels == 1).sum())} phishing)"]
+
+    for name in backends:
+        rss_before = rss_mb()
+        backend = load_backend(name, args.model, args.onnx_dir)
+        rss_loaded = rss_mb() - rss_before
+
+        probs, elapsed = run_backend(backend, tokenizer, texts, args.batch_size)
+        predictions = probs.argmax(axis=-1)
+        if reference is None:
+            reference = probs
+
+        accuracy = (predictions == labels).mean() * 100
+        agreement = (predictions == reference.argmax(axis=-1)).mean() * 100
+        drift = np.abs(probs[:, 1] - reference[:, 1])
+
+        lines.append(
+            f"{name:<11} accuracy {accuracy:6.2f}% | agreement with fp32 {agreement:6.2f}% | "
+            f"prob drift mean {drift.mean():.5f} max {drift.max():.5f} | "
+            f"{elapsed / len(texts) * 1000:.2f} ms/sample | +{rss_loaded:.0f} MB RSS on load"
+        )
+        del backend
+
+    report = "\n".join(lines)
+    print(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(report + "\n")
+    print(f"Report saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
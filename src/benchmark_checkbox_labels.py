@@ -0,0 +1,53 @@
+import time
+import argparse
+import config
+from extractor import clean_text, generate_text_representation, generate_text_representation_soup
+
+def build_page(checkboxes, layout):
+    # "inline": each checkbox followed by its label, like a consent form.
+    # "table": all checkboxes first and the labels after them, the worst case for a forward scan.
+    rows = [f'<input type="checkbox" id="c{i}" name="agree{i}"><span>option {i}</span>' for i in range(checkboxes)]
+    labels = [f'<label for="c{i}">I agree to term {i}</label>' for i in range(checkboxes)]
+    if layout == "inline":
+        body = "".join(row + label for row, label in zip(rows, labels))
+    else:
+        body = "".join(rows) + "".join(labels)
+    return f"<html><head><title>Consent</title></head><body><form action='/submit'>{body}</form></body></html>"
+
+def find_next_labels(html_content):
+    # What the extractor did before: one find_next('label') scan per checkbox
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, "lxml")
+    labels = []
+    for node in soup.find_all("input", attrs={"type": "checkbox"}):
+        label_element = node.find_next('label')
+        labels.append(clean_text(label_element.get_text()) if label_element else "<EMPTY>")
+    return labels
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Time checkbox label resolution on pages with thousands of checkboxes.')
+    parser.add_argument('--checkboxes', type=int, nargs='+', default=[500, 1000, 2000, 4000])
+    parser.add_argument('--layouts', nargs='+', choices=['inline', 'table'], default=['inline', 'table'])
+    args = parser.parse_args()
+
+    print(f"{'layout':<8}{'checkboxes':>12}{'find_next ms':>14}{'soup ms':>10}{'streaming ms':>14}{'same labels':>13}")
+    for layout in args.layouts:
+        for count in args.checkboxes:
+            html_content = build_page(count, layout)
+            labels, scan_ms = timed(find_next_labels, html_content)
+            reference, soup_ms = timed(generate_text_representation_soup, html_content)
+            output, streaming_ms = timed(generate_text_representation, html_content)
+
+            extracted = [line.split('label: "', 1)[1].split('"', 1)[0]
+                         for line in output.split("\n") if line.startswith("CHECKBOX")]
+            # With for/id matching on, the labels are meant to differ from the forward scan
+            same = output == reference and (config.EXTRACTION_LABEL_FOR_ID or extracted == labels)
+            print(f"{layout:<8}{count:>12}{scan_ms:>14.1f}{soup_ms:>10.1f}{streaming_ms:>14.1f}{str(same):>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from extractor import generate_text_representation
+
+DEFAULT_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "example_parsing_html", "lmsattt.html")
+
+def read_file(path):
+    for enc in ("utf-8", "latin1"):
+        try:
+            with open(path, "r", encoding=enc) as file:
+                return file.read()
+        except Exception:
+            pass
+    raise OSError(f"Cannot read file: {path}")
+
+def build_page(path, target_bytes):
+    # Repeat the saved page until it reaches the requested size, like a multi-megabyte phishing kit page.
+    html_content = read_file(path)
+    repeat = max(1, target_bytes // max(1, len(html_content.encode("utf-8"))))
+    return html_content * repeat
+
+def run_worker(args):
+    html_content = build_page(args.page, args.size)
+
+    budget = None
+    measure = None
+    if args.worker == "budget":
+        if args.tokenizer:
+            from tokenization import load_tokenizer, token_counter
+            tokenizer = load_tokenizer(args.tokenizer)
+            budget = args.max_length - 2
+            measure = token_counter(tokenizer)
+        else:
+            budget = args.budget_chars
+
+    timings = []
+    output = ""
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        output = generate_text_representation(html_content, budget=budget, measure=measure)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(json.dumps({
+        "mode": args.worker,
+        "page_bytes": len(html_content.encode("utf-8")),
+        "output_chars": len(output),
+        "median_ms": timings[len(timings) // 2] * 1000.0,
+        "min_ms": timings[0] * 1000.0,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare full extraction with budget-limited extraction on large pages.')
+    parser.add_argument('--page', default=DEFAULT_PAGE, help='Saved HTML page used to build the large pages.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1 << 20, 4 << 20, 16 << 20], help='Page sizes in bytes.')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per mode and size.')
+    parser.add_argument('--tokenizer', help='Model folder; enables the exact token budget instead of a character budget.')
+    parser.add_argument('--max-length', type=int, default=128)
+    parser.add_argument('--budget-chars', type=int, default=2000)
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--worker', choices=['full', 'budget'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    # Each measurement runs in a fresh process so peak RSS is not shared between modes
+    results = []
+    for size in args.sizes:
+        for mode in ("full", "budget"):
+            command = [sys.executable, os.path.abspath(__file__), "--worker", mode, "--size", str(size),
+                       "--page", args.page, "--runs", str(args.runs), "--max-length", str(args.max_length),
+                       "--budget-chars", str(args.budget_chars)]
+            if args.tokenizer:
+                command += ["--tokenizer", args.tokenizer]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'mode':<8}{'page MB':>10}{'median ms':>12}{'peak RSS MB':>14}{'output chars':>14}")
+    for result in results:
+        print(f"{result['mode']:<8}{result['page_bytes'] / 1048576:>10.1f}{result['median_ms']:>12.1f}"
+              f"{result['peak_rss_mb']:>14.1f}{result['output_chars']:>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import os
+import glob
+import time
+import argparse
+from lxml import etree
+import extractor
+from extractor import generate_text_representation, generate_text_representation_soup
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "example_parsing_html")
+
+def read_file(path):
+    for enc in ("utf-8", "latin1"):
+        try:
+            with open(path, "r", encoding=enc) as file:
+                return file.read()
+        except Exception:
+            pass
+    raise OSError(f"Cannot read file: {path}")
+
+class _Recorder:
+    # Keeps the parser events so the handlers can be timed without libxml2's own parsing cost
+    def __init__(self):
+        self.events = []
+
+    def start(self, tag, attrs, nsmap=None):
+        self.events.append((0, tag, dict(attrs)))
+
+    def end(self, tag):
+        self.events.append((1, tag, None))
+
+    def data(self, content):
+        self.events.append((2, content, None))
+
+    def close(self):
+        return self.events
+
+class _NullTarget:
+    def start(self, tag, attrs, nsmap=None):
+        pass
+
+    def end(self, tag):
+        pass
+
+    def data(self, content):
+        pass
+
+    def close(self):
+        return ""
+
+def record_events(html_content):
+    parser = etree.HTMLParser(target=_Recorder(), recover=True)
+    parser.feed(html_content)
+    return parser.close()
+
+def replay(events, target):
+    start, end, data = target.start, target.end, target.data
+    for kind, value, attrs in events:
+        if kind == 0:
+            start(value, attrs)
+        elif kind == 1:
+            end(value)
+        else:
+            data(value)
+    return target.close()
+
+def best_of(function, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the compiled extraction rules per page and per element, and check them against the BeautifulSoup reference.')
+    parser.add_argument('pages', nargs='*', help='HTML files; default the saved example pages.')
+    parser.add_argument('--repeat', type=int, default=20, help='Copies of each page concatenated, for steadier timings.')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    pages = args.pages or sorted(glob.glob(os.path.join(EXAMPLE_DIR, "*.html")))
+    if not pages:
+        print("No pages to benchmark.")
+        return
+
+    print(f"{len(extractor.DISPATCH)} tags in the rule table")
+    print(f"{'page':<28}{'elements':>10}{'soup ms':>10}{'rules ms':>10}{'handlers ns/el':>16}{'identical':>11}")
+    for path in pages:
+        html_content = read_file(path) * args.repeat
+        reference = generate_text_representation_soup(html_content)
+        identical = generate_text_representation(html_content) == reference
+
+        events = record_events(html_content)
+        elements = sum(1 for kind, _, _ in events if kind == 0)
+        # Handler cost only: replaying into the rule engine minus replaying into a target that does nothing
+        handlers = best_of(lambda: replay(events, extractor._StreamingTarget()), args.runs)
+        overhead = best_of(lambda: replay(events, _NullTarget()), args.runs)
+
+        soup_ms = best_of(lambda: generate_text_representation_soup(html_content), max(1, args.runs // 4)) * 1000
+        rules_ms = best_of(lambda: generate_text_representation(html_content), args.runs) * 1000
+        print(f"{os.path.basename(path)[:27]:<28}{elements:>10}{soup_ms:>10.1f}{rules_ms:>10.2f}"
+              f"{(handlers - overhead) / max(1, elements) * 1e9:>16.0f}{str(identical):>11}")
+
+if __name__ == "__main__":
+    main()
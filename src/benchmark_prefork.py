@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+import httpx
+import psutil
+from scheduler import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PAGE = os.path.join(HERE, "example_parsing_html", "lmsattt.html")
+
+def start_server(workers, port, threads):
+    env = dict(os.environ, ANTIPHISHING_PORT=str(port))
+    if workers == 0:
+        command = [sys.executable, os.path.join(HERE, "app.py")]
+    else:
+        command = [sys.executable, os.path.join(HERE, "prefork_server.py"), "--workers", str(workers), "--threads", str(threads)]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_ready(url, process, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{url}/cache_stats", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit("Server did not start in time")
+
+def memory(process):
+    # RSS counts shared pages in every process; PSS splits them between the processes that share them
+    processes = [psutil.Process(process.pid)]
+    processes += processes[0].children(recursive=True)
+    usage = []
+    for p in processes:
+        info = p.memory_full_info()
+        usage.append((info.rss / 1048576, getattr(info, "pss", info.rss) / 1048576))
+    return usage
+
+async def run_load(url, page, concurrency, total, run_id):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(timeout=120, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def one(i):
+            nonlocal errors
+            # The page is sent in the request, so only extraction + inference is measured;
+            # a unique URL keeps the verdict cache out of the way
+            payload = {"url": f"http://bench.local/{run_id}/{i}", "html": page + f"<p>{i}</p>"}
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(f"{url}/check_url", json=payload)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return total / elapsed, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000, errors
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the single-process Flask server with the pre-fork server.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 2, 4], help='0 = single-process app.py.')
+    parser.add_argument('--threads', type=int, default=0, help='Torch threads per worker, 0 = cores / workers.')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--page', default=DEFAULT_PAGE)
+    parser.add_argument('--port', type=int, default=5090)
+    args = parser.parse_args()
+
+    with open(args.page, "r", encoding="utf-8", errors="ignore") as f:
+        page = f.read()
+
+    rows = []
+    for workers in args.workers:
+        url = f"http://127.0.0.1:{args.port}"
+        process = start_server(workers, args.port, args.threads)
+        try:
+            wait_ready(url, process)
+            asyncio.run(run_load(url, page, args.concurrency, args.concurrency * 2, f"warmup-{workers}"))
+            throughput, p50, p99, errors = asyncio.run(run_load(url, page, args.concurrency, args.requests, f"run-{workers}"))
+            usage = memory(process)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+        # With workers the first process is the parent that loaded the model, the rest serve requests
+        serving = usage[1:] if workers else usage
+        rows.append({
+            "mode": f"prefork x{workers}" if workers else "app.py",
+            "throughput": throughput, "p50": p50, "p99": p99, "errors": errors,
+            "rss_per_worker": sum(rss for rss, _ in serving) / len(serving),
+            "pss_total": sum(pss for _, pss in usage),
+            "rss_total": sum(rss for rss, _ in usage),
+        })
+
+    print(f"{os.cpu_count()} CPUs, concurrency {args.concurrency}, {args.requests} requests")
+    print(f"{'mode':<12}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}{'RSS/worker MB':>15}{'RSS sum MB':>12}{'PSS sum MB':>12}")
+    for row in rows:
+        print(f"{row['mode']:<12}{row['throughput']:>8.1f}{row['p50']:>9.0f}{row['p99']:>9.0f}{row['errors']:>8}"
+              f"{row['rss_per_worker']:>15.0f}{row['rss_total']:>12.0f}{row['pss_total']:>12.0f}")
+
+if __name__ == "__main__":
+    main()
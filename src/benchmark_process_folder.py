@@ -0,0 +1,75 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from parsing_html import process_folder
+
+DEFAULT_PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "example_parsing_html")
+
+def build_dataset(pages_folder, folder, count):
+    # Copies of the saved pages, each with a small unique tail so no two inputs are identical
+    pages = []
+    for name in sorted(os.listdir(pages_folder)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(pages_folder, name), "r", encoding="utf-8", errors="ignore") as f:
+                pages.append(f.read())
+    if not pages:
+        raise SystemExit(f"No .html pages in {pages_folder}")
+
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(folder, f"site_{i:06d}.txt"), "w", encoding="utf-8") as f:
+            f.write(pages[i % len(pages)] + f"<p>sample {i}</p>")
+
+def read_outputs(folder):
+    outputs = {}
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name), "r", encoding="utf-8") as f:
+            outputs[name] = f.read()
+    return outputs
+
+def main():
+    parser = argparse.ArgumentParser(description='Files per second of process_folder at several worker counts.')
+    parser.add_argument('--pages', default=DEFAULT_PAGES, help='Folder of saved .html pages used to build the dataset.')
+    parser.add_argument('--files', type=int, default=2000, help='Number of input files.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--chunksize', type=int, default=32)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="process_folder_bench_")
+    try:
+        input_dir = os.path.join(work_dir, "input")
+        build_dataset(args.pages, input_dir, args.files)
+        print(f"{args.files} files, {os.cpu_count()} CPUs")
+
+        results = []
+        reference = None
+        for workers in args.workers:
+            output_dir = os.path.join(work_dir, f"output_{workers}")
+            start = time.perf_counter()
+            process_folder(input_dir, output_dir, workers=workers, chunksize=args.chunksize, force=True)
+            elapsed = time.perf_counter() - start
+
+            # Every worker count has to produce exactly the same files
+            outputs = read_outputs(output_dir)
+            if reference is None:
+                reference = outputs
+            identical = outputs == reference
+            results.append((workers, elapsed, args.files / elapsed, identical))
+
+            # A second run over the same folder only checks timestamps
+            start = time.perf_counter()
+            process_folder(input_dir, output_dir, workers=workers, chunksize=args.chunksize)
+            resume_elapsed = time.perf_counter() - start
+            print(f"workers={workers}: resume pass over up-to-date outputs took {resume_elapsed:.2f} s")
+
+        base_rate = results[0][2]
+        print(f"{'workers':>8}{'seconds':>10}{'files/s':>10}{'speedup':>10}{'identical':>11}")
+        for workers, elapsed, rate, identical in results:
+            print(f"{workers:>8}{elapsed:>10.2f}{rate:>10.1f}{rate / base_rate:>10.2f}{str(identical):>11}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
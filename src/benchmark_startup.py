@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PAGE = "<html><head><title>Login</title></head><body><a href='#'>Sign in</a><button>Continue</button></body></html>"
+
+def measure_startup(server, background, port, timeout):
+    env = dict(os.environ, ANTIPHISHING_PORT=str(port), ANTIPHISHING_BACKGROUND_LOAD="1" if background else "0")
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(HERE, server)], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    timings = {"port": None, "ready": None, "first_check": None}
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            while time.perf_counter() - start < timeout:
+                if process.poll() is not None:
+                    raise SystemExit(f"{server} exited with code {process.returncode}")
+                try:
+                    health = client.get(f"{url}/health")
+                except httpx.TransportError:
+                    time.sleep(0.05)
+                    continue
+                now = time.perf_counter() - start
+                timings["port"] = timings["port"] or now
+                if health.status_code == 200:
+                    timings["ready"] = timings["ready"] or now
+                    break
+                time.sleep(0.05)
+
+            # The first /check_url a user would send; a unique URL so no cached verdict answers it
+            while time.perf_counter() - start < timeout:
+                response = client.post(f"{url}/check_url", json={"url": f"http://startup.local/{port}/{start}", "html": PAGE})
+                if response.status_code == 200:
+                    timings["first_check"] = time.perf_counter() - start
+                    break
+                time.sleep(0.05)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='Time from process start to bound port, ready model and first successful /check_url.')
+    parser.add_argument('--server', choices=['app.py', 'asgi_app.py'], default='app.py')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--port', type=int, default=5091)
+    parser.add_argument('--timeout', type=float, default=300.0)
+    args = parser.parse_args()
+
+    print(f"{args.server}, model {os.environ.get('ANTIPHISHING_MODEL_PATH', 'from config')}, median of {args.runs} runs")
+    print(f"{'startup':<12}{'port s':>9}{'ready s':>9}{'first check s':>15}")
+    for background in (False, True):
+        runs = [measure_startup(args.server, background, args.port, args.timeout) for _ in range(args.runs)]
+        medians = {key: statistics.median(run[key] for run in runs if run[key] is not None) for key in runs[0]}
+        print(f"{'background' if background else 'blocking':<12}{medians['port']:>9.2f}{medians['ready']:>9.2f}{medians['first_check']:>15.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+from scheduler import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Fixed corpus of saved pages (sources in sample_pages/SOURCES.txt): a small login page, a
+# median-size documentation page with forms and scripts and a real 860 KiB page
+PAGES = {
+    "small": os.path.join(HERE, "benchmark_pages", "small_login.html"),
+    "median": os.path.join(HERE, "sample_pages", "rust_book_box.html"),
+    "large": os.path.join(HERE, "sample_pages", "rustdoc_vec_large.html"),
+}
+STAGES = ("parse", "extract", "tokenize", "infer")
+MODEL_STAGES = ("tokenize", "infer", "check_url")
+
+def read_page(name):
+    with open(PAGES[name], "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def summarize(latencies, elapsed, **extra):
+    return {
+        "iterations": len(latencies),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000.0,
+        "p50_ms": percentile(latencies, 50) * 1000.0,
+        "p90_ms": percentile(latencies, 90) * 1000.0,
+        "p99_ms": percentile(latencies, 99) * 1000.0,
+        **extra,
+    }
+
+def time_calls(function, iterations, warmup, min_seconds):
+    for _ in range(warmup):
+        function()
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < iterations or time.perf_counter() - start < min_seconds:
+        call_start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - call_start)
+    return latencies, time.perf_counter() - start
+
+def run_stage(args):
+    # Runs in its own process, so peak memory belongs to this stage and page only
+    from lxml import etree
+    from extractor import generate_text_representation
+
+    html_content = read_page(args.page)
+    text = generate_text_representation(html_content)
+    if args.stage == "parse":
+        parser = etree.HTMLParser(recover=True)
+        function = lambda: etree.fromstring(html_content, parser)
+    elif args.stage == "extract":
+        function = lambda: generate_text_representation(html_content)
+    else:
+        import torch
+        from tokenization import load_tokenizer, encode_batch
+        torch.manual_seed(0)
+        torch.set_num_threads(args.threads)
+        tokenizer = load_tokenizer(args.model)
+        if args.stage == "tokenize":
+            function = lambda: encode_batch(tokenizer, [text] * args.batch_size)
+        else:
+            from inference import load_backend
+            backend = load_backend(args.backend, args.model)
+            inputs = encode_batch(tokenizer, [text] * args.batch_size, return_tensors=backend.tensor_type)
+            function = lambda: backend.logits(inputs)
+
+    rss_before = peak_rss_mb()
+    latencies, elapsed = time_calls(function, args.iterations, args.warmup, args.min_seconds)
+    result = summarize(latencies, elapsed, page_bytes=len(html_content.encode("utf-8")),
+                       peak_rss_mb=peak_rss_mb(), stage_rss_mb=peak_rss_mb() - rss_before)
+    print(json.dumps(result))
+
+def server_peak_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import psutil
+    return psutil.Process(pid).memory_info().rss / 1048576.0
+
+def run_check_url(args, pages):
+    # The whole path: the service fetches each page from a local stand-in server, extracts it
+    # and runs the model. The verdict cache is off so every request does the full work.
+    import httpx
+    from load_test import start_stand_in_server
+
+    names = list(pages)
+    stand_in = start_stand_in_server([pages[name].encode("utf-8") for name in names], 0.0, args.stand_in_port)
+    env = dict(os.environ, ANTIPHISHING_PORT=str(args.port), ANTIPHISHING_MODEL_PATH=args.model,
+               ANTIPHISHING_BACKEND=args.backend, ANTIPHISHING_CACHE="0", ANTIPHISHING_BACKGROUND_LOAD="0",
+               ANTIPHISHING_FETCH_MAX_BYTES=str(8 << 20), ANTIPHISHING_TORCH_THREADS=str(args.threads),
+               OMP_NUM_THREADS=str(args.threads), PYTHONHASHSEED="0")
+    process = subprocess.Popen([sys.executable, os.path.join(HERE, "app.py")], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    service_url = f"http://127.0.0.1:{args.port}"
+    results = {}
+    try:
+        with httpx.Client(timeout=120) as client:
+            deadline = time.time() + 300
+            while True:
+                if process.poll() is not None:
+                    raise SystemExit(f"app.py exited with code {process.returncode}")
+                try:
+                    if client.get(f"{service_url}/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.time() > deadline:
+                    raise SystemExit("app.py did not become ready in time")
+                time.sleep(0.2)
+
+            for index, name in enumerate(names):
+                counter = iter(range(10 ** 9))
+                errors = []
+
+                def one():
+                    page_url = f"http://127.0.0.1:{args.stand_in_port}/page/{index}?n={next(counter)}"
+                    response = client.post(f"{service_url}/check_url", json={"url": page_url})
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+
+                latencies, elapsed = time_calls(one, args.iterations, args.warmup, args.min_seconds)
+                results[name] = summarize(latencies, elapsed, page_bytes=len(pages[name].encode("utf-8")),
+                                          errors=len(errors))
+            peak = server_peak_rss_mb(process.pid)
+            for result in results.values():
+                result["peak_rss_mb"] = peak
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        stand_in.shutdown()
+    return results
+
+def environment(args):
+    versions = {}
+    for module in ("lxml", "torch", "transformers", "tokenizers", "onnxruntime"):
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "threads": args.threads,
+        "backend": args.backend,
+        "model": args.model,
+        "batch_size": args.batch_size,
+        "versions": versions,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    # A row regresses when p50 latency or peak memory grows, or throughput drops, past the tolerance
+    regressions = []
+    print(f"\n{'benchmark':<22}{'p50 ms':>10}{'base':>10}{'change':>9}{'req/s':>10}{'base':>10}{'RSS MB':>9}{'base':>9}  status")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<22}{result['p50_ms']:>10.2f}{'-':>10}{'':>9}{result['throughput']:>10.1f}{'-':>10}"
+                  f"{result['peak_rss_mb']:>9.0f}{'-':>9}  new")
+            continue
+        change = result["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+        problems = []
+        if change > tolerance:
+            problems.append("latency")
+        if base["throughput"] and result["throughput"] < base["throughput"] * (1 - tolerance):
+            problems.append("throughput")
+        if base.get("peak_rss_mb") and result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + memory_tolerance):
+            problems.append("memory")
+        if problems:
+            regressions.append((key, problems))
+        print(f"{key:<22}{result['p50_ms']:>10.2f}{base['p50_ms']:>10.2f}{change * 100:>+8.1f}%{result['throughput']:>10.1f}"
+              f"{base['throughput']:>10.1f}{result['peak_rss_mb']:>9.0f}{base.get('peak_rss_mb', 0):>9.0f}  "
+              f"{'REGRESSION: ' + ', '.join(problems) if problems else 'ok'}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-stage and end-to-end benchmarks on a fixed page corpus, with baseline comparison.')
+    parser.add_argument('--model', help='Model folder; tokenize, infer and check_url are skipped without it.')
+    parser.add_argument('--backend', default='torch')
+    parser.add_argument('--stages', nargs='+', choices=STAGES + ('check_url',), default=list(STAGES) + ['check_url'])
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=list(PAGES))
+    parser.add_argument('--iterations', type=int, default=20, help='Minimum timed calls per benchmark.')
+    parser.add_argument('--min-seconds', type=float, default=1.0, help='Minimum timed duration per benchmark.')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=1, help='Torch threads; fixed so runs are comparable.')
+    parser.add_argument('--batch-size', type=int, default=1, help='Texts per tokenize/infer call.')
+    parser.add_argument('--port', type=int, default=5092)
+    parser.add_argument('--stand-in-port', type=int, default=5093)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='Earlier --output file to compare against, e.g. the committed benchmark_reference.json.')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed relative latency/throughput change.')
+    parser.add_argument('--memory-tolerance', type=float, default=0.10)
+    parser.add_argument('--stage', help=argparse.SUPPRESS)
+    parser.add_argument('--page', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        run_stage(args)
+        return
+
+    stages = [stage for stage in args.stages if args.model or stage not in MODEL_STAGES]
+    skipped = [stage for stage in args.stages if stage not in stages]
+    if skipped:
+        print(f"No --model given, skipping {', '.join(skipped)}")
+
+    results = {}
+    for stage in stages:
+        if stage == "check_url":
+            continue
+        for page in args.pages:
+            command = [sys.executable, os.path.abspath(__file__), "--stage", stage, "--page", page,
+                       "--iterations", str(args.iterations), "--min-seconds", str(args.min_seconds),
+                       "--warmup", str(args.warmup), "--threads", str(args.threads),
+                       "--batch-size", str(args.batch_size), "--backend", args.backend]
+            if args.model:
+                command += ["--model", args.model]
+            env = dict(os.environ, PYTHONHASHSEED="0", OMP_NUM_THREADS=str(args.threads))
+            output = subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout
+            results[f"{stage}/{page}"] = json.loads(output.strip().splitlines()[-1])
+            print(f"{stage}/{page}: p50 {results[f'{stage}/{page}']['p50_ms']:.2f} ms")
+
+    if "check_url" in stages:
+        pages = {page: read_page(page) for page in args.pages}
+        for page, result in run_check_url(args, pages).items():
+            results[f"check_url/{page}"] = result
+            print(f"check_url/{page}: p50 {result['p50_ms']:.2f} ms, {result['errors']} errors")
+
+    print(f"\n{'benchmark':<22}{'KB':>8}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'peak RSS MB':>13}")
+    for key, result in results.items():
+        print(f"{key:<22}{result['page_bytes'] / 1024:>8.0f}{result['throughput']:>10.1f}{result['p50_ms']:>10.2f}"
+              f"{result['p90_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['peak_rss_mb']:>13.0f}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(args), "results": results}, f, indent=2)
+    print(f"Results saved to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance, args.memory_tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+import json
+import argparse
+import tempfile
+from tokenization import load_tokenizer, window_budget
+from inference import BACKENDS, POOLINGS, load_backend, default_device
+from evaluate import DEFAULT_MODEL, DEFAULT_BENIGN_DIR, DEFAULT_PHISHING_DIR, LABEL_IDS, iter_samples, evaluate
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency against accuracy of sliding-window scoring on the prediction dataset.')
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--benign-dir', default=DEFAULT_BENIGN_DIR)
+    parser.add_argument('--phishing-dir', default=DEFAULT_PHISHING_DIR)
+    parser.add_argument('--corpus', help='Folder of corpus shards; used instead of the two sample folders.')
+    parser.add_argument('--max-files', type=int, default=2000, help='Maximum samples per label.')
+    parser.add_argument('--windows', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--poolings', nargs='+', choices=POOLINGS, default=list(POOLINGS))
+    parser.add_argument('--stride', type=int, default=32)
+    parser.add_argument('--backend', choices=BACKENDS, default='torch')
+    parser.add_argument('--device', default=default_device())
+    parser.add_argument('--batch-size', type=int, default=64, help='Samples per batch (each brings up to --windows rows).')
+    parser.add_argument('--output-json', help='Also write the results to this file.')
+    args = parser.parse_args()
+
+    folders = {'benign': args.benign_dir, 'phishing': args.phishing_dir}
+    for label, folder in folders.items():
+        if not args.corpus and not os.path.isdir(folder):
+            print(f"The folder {folder} does not exist.")
+            return
+
+    def samples():
+        for label in LABEL_IDS:
+            yield from iter_samples(label, folders[label], args.corpus, args.max_files)
+
+    backend = load_backend(args.backend, args.model, device=args.device)
+    tokenizer = load_tokenizer(args.model)
+
+    # Untimed pass so the first configuration does not pay for the warm-up
+    with tempfile.TemporaryDirectory() as tmp:
+        evaluate(backend, tokenizer, iter_samples('benign', folders['benign'], args.corpus, args.batch_size),
+                 os.path.join(tmp, "warmup.csv"), batch_size=args.batch_size)
+
+        results = []
+        for windows in args.windows:
+            # One window does not depend on the pooling
+            for pooling in (args.poolings if windows > 1 else args.poolings[:1]):
+                summary = evaluate(backend, tokenizer, samples(), os.path.join(tmp, "results.csv"),
+                                   batch_size=args.batch_size, windows=windows, stride=args.stride, pooling=pooling,
+                                   log_every=10 ** 9)
+                results.append({"windows": windows, "pooling": pooling if windows > 1 else "-",
+                                "token_budget": window_budget(windows, args.stride), **summary})
+
+    base = results[0]
+    print(f"{base['total']} samples, stride {args.stride}, backend {args.backend}")
+    print(f"{'windows':>8}{'pooling':>11}{'tokens':>8}{'win/sample':>12}{'ms/sample':>11}{'x latency':>11}"
+          f"{'accuracy':>10}{'recall':>8}{'F1':>8}{'d F1':>8}")
+    for result in results:
+        ms = 1000 / result["samples_per_second"] if result["samples_per_second"] else 0.0
+        base_ms = 1000 / base["samples_per_second"] if base["samples_per_second"] else 0.0
+        print(f"{result['windows']:>8}{result['pooling']:>11}{result['token_budget']:>8}{result['windows_per_sample']:>12.2f}"
+              f"{ms:>11.2f}{ms / base_ms if base_ms else 0.0:>11.2f}{result['accuracy'] * 100:>9.2f}%"
+              f"{result['recall']:>8.4f}{result['f1']:>8.4f}{result['f1'] - base['f1']:>+8.4f}")
+
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
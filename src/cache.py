@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import atexit
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+import xxhash
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def normalize_url(url):
+    # Same page, same key: lowercase scheme/host, no default port, no fragment, "/" for an empty path
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+def content_hash(html_content):
+    return xxhash.xxh3_64_hexdigest(html_content.encode("utf-8", errors="ignore"))
+
+def make_key(url, html_content=None):
+    key = normalize_url(url)
+    if html_content is not None:
+        key = f"{key}#{content_hash(html_content)}"
+    return key
+
+class VerdictCache:
+    # Bounded LRU of verdicts with a TTL per entry, optionally persisted to a JSON file.
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600.0, persist_path=None, save_interval=60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.persist_path = persist_path
+        self.save_interval = save_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        if persist_path:
+            self.load()
+            atexit.register(self.save)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._dirty = True
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+        self.maybe_save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "persist_path": self.persist_path,
+            }
+
+    def maybe_save(self):
+        # systemd stops the service with SIGTERM, which skips atexit, so save periodically as well
+        if self.persist_path and self._dirty and time.time() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        if not self.persist_path:
+            return
+        with self._save_lock:
+            now = time.time()
+            with self._lock:
+                entries = [[key, value, expires_at] for key, (value, expires_at) in self._entries.items() if expires_at > now]
+                self._dirty = False
+                self._last_save = now
+
+            # Per process: pre-forked serving workers may save the same file at the same time
+            tmp_path = f"{self.persist_path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.persist_path)
+            except OSError as e:
+                print(f"[WARN] Cannot save verdict cache to {self.persist_path}: {e}")
+
+    def load(self):
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Cannot load verdict cache from {self.persist_path}: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            # Entries were saved least recently used first, so the LRU order survives restarts
+            for key, value, expires_at in entries[-self.max_entries:]:
+                if expires_at > now:
+                    self._entries[key] = (value, expires_at)
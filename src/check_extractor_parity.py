@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import argparse
+import config
+import reference_extractor
+from extractor import generate_text_representation, generate_text_representation_soup
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# The saved LMS page and real pages of different shapes and sizes (see sample_pages/SOURCES.txt)
+DEFAULT_CORPUS = [os.path.join(HERE, "example_parsing_html"), os.path.join(HERE, "sample_pages")]
+HTML_EXTENSIONS = (".html", ".htm", ".txt")
+
+def read_file(path):
+    for enc in ("utf-8", "latin1"):
+        try:
+            with open(path, "r", encoding=enc) as file:
+                return file.read()
+        except Exception:
+            pass
+    return None
+
+def collect_files(paths, limit):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full_path = os.path.join(path, name)
+                if os.path.isfile(full_path) and name.endswith(HTML_EXTENSIONS):
+                    files.append(full_path)
+        elif os.path.isfile(path):
+            files.append(path)
+    return files[:limit] if limit else files
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the streaming and BeautifulSoup extractors match the original extractor byte for byte.')
+    parser.add_argument('paths', nargs='*', default=DEFAULT_CORPUS, help='HTML files or folders of saved pages.')
+    parser.add_argument('--limit', type=int, default=0, help='Check at most this many files.')
+    args = parser.parse_args()
+
+    if config.EXTRACTION_LABEL_FOR_ID:
+        print("[WARN] ANTIPHISHING_LABEL_FOR_ID is on: checkbox labels are expected to differ from the original extractor")
+
+    files = collect_files(args.paths, args.limit)
+    mismatches = []
+    reference_time = 0.0
+    soup_time = 0.0
+    stream_time = 0.0
+
+    for path in files:
+        html_content = read_file(path)
+        if html_content is None:
+            print(f"[WARN] Cannot read file: {path}")
+            continue
+
+        start = time.perf_counter()
+        expected = reference_extractor.generate_text_representation(html_content).encode("utf-8")
+        reference_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        soup = generate_text_representation_soup(html_content)
+        soup_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = generate_text_representation(html_content)
+        stream_time += time.perf_counter() - start
+
+        for name, output in (("streaming", actual), ("BeautifulSoup", soup)):
+            if output.encode("utf-8") != expected:
+                mismatches.append((name, path))
+                print(f"[MISMATCH] {name} extractor: {path}")
+
+    print(f"Files checked: {len(files)}")
+    print(f"Mismatches: {len(mismatches)}")
+    print(f"Original extractor: {reference_time:.3f}s")
+    print(f"BeautifulSoup extractor: {soup_time:.3f}s")
+    print(f"Streaming extractor: {stream_time:.3f}s")
+
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import argparse
+from extractor import generate_text_representation
+from tokenization import load_tokenizer, encode_batch
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(SRC_DIR, "example_parsing_html")
+DEFAULT_MODEL = os.path.join(SRC_DIR, "model")
+
+def read_file(path):
+    for enc in ("utf-8", "latin1"):
+        try:
+            with open(path, "r", encoding=enc) as file:
+                return file.read()
+        except Exception:
+            pass
+    return None
+
+def load_texts(paths, limit):
+    # .html pages are run through the extractor, .txt files are used as already extracted text
+    texts = []
+    for path in paths:
+        names = sorted(os.listdir(path)) if os.path.isdir(path) else [os.path.basename(path)]
+        folder = path if os.path.isdir(path) else os.path.dirname(path)
+        for name in names:
+            if not name.endswith((".html", ".htm", ".txt")):
+                continue
+            content = read_file(os.path.join(folder, name))
+            if content is None:
+                continue
+            if name.endswith((".html", ".htm")):
+                content = generate_text_representation(content)
+            texts.append((name, content))
+    return texts[:limit] if limit else texts
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the fast tokenizer produces the same ids as MobileBertTokenizer.')
+    parser.add_argument('paths', nargs='*', default=[DEFAULT_CORPUS], help='Folders or files with pages or extracted text.')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Folder with the saved tokenizer.')
+    parser.add_argument('--limit', type=int, default=0)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    slow = load_tokenizer(args.model, fast=False)
+    fast = load_tokenizer(args.model)
+    texts = load_texts(args.paths, args.limit)
+
+    mismatches = 0
+    slow_time = 0.0
+    fast_time = 0.0
+
+    for offset in range(0, len(texts), args.batch_size):
+        batch = texts[offset:offset + args.batch_size]
+        contents = [content for _, content in batch]
+
+        start = time.perf_counter()
+        expected = [encode_batch(slow, [content], return_tensors=None) for content in contents]
+        slow_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = encode_batch(fast, contents, return_tensors=None)
+        fast_time += time.perf_counter() - start
+
+        for index, (name, _) in enumerate(batch):
+            if (actual["input_ids"][index] != expected[index]["input_ids"][0]
+                    or actual["attention_mask"][index] != expected[index]["attention_mask"][0]):
+                mismatches += 1
+                print(f"[MISMATCH] {name}")
+
+    print(f"Texts checked: {len(texts)}")
+    print(f"Mismatches: {mismatches}")
+    print(f"MobileBertTokenizer, one text per call: {slow_time:.3f}s")
+    print(f"MobileBertTokenizerFast, batched: {fast_time:.3f}s")
+
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import sys
+import argparse
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from url_model import UrlModel, url_features, vectorize
+
+# URLs urlsplit rejects or cannot give a host/port for; the URL stage must escalate or score
+# them without failing the other URLs of the same call
+MALFORMED_URLS = [
+    "http://[abc",
+    "http://[::1",
+    "https://example.com:99999/login",
+    "http://exa mple.com]/",
+    "",
+    "   ",
+]
+WELL_FORMED_URLS = [
+    "https://www.google.com/",
+    "http://secure-login-paypal.com.verify-account.xyz/webscr.php?cmd=login",
+]
+TRAINING_URLS = [
+    ("https://www.wikipedia.org/", 0),
+    ("https://github.com/python/cpython", 0),
+    ("https://docs.python.org/3/library/urllib.parse.html", 0),
+    ("https://www.ptit.edu.vn/", 0),
+    ("http://paypal-verify-account.xyz/login.php", 1),
+    ("http://192.168.10.4/bank/secure/update.php?id=1", 1),
+    ("http://appleid.apple.com.signin-confirm.top/verify", 1),
+    ("http://bit.ly/wallet-unlock-recover", 1),
+]
+
+def small_model():
+    urls = [url for url, _ in TRAINING_URLS]
+    labels = np.array([label for _, label in TRAINING_URLS])
+    classifier = LogisticRegression(C=4.0, solver="liblinear").fit(vectorize(urls), labels)
+    return UrlModel(classifier, 0.3, 0.7)
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that malformed URLs are escalated by the URL stage instead of failing it.')
+    parser.parse_args()
+
+    failures = []
+    for url in MALFORMED_URLS:
+        try:
+            url_features(url)
+        except Exception as e:
+            failures.append(f"url_features({url!r}) raised {type(e).__name__}: {e}")
+
+    model = small_model()
+    urls = WELL_FORMED_URLS + MALFORMED_URLS + [None, 123]
+    try:
+        decisions = model.decide_many(urls)
+    except Exception as e:
+        decisions = None
+        failures.append(f"decide_many raised {type(e).__name__}: {e}")
+
+    if decisions is not None:
+        if len(decisions) != len(urls):
+            failures.append(f"decide_many returned {len(decisions)} decisions for {len(urls)} URLs")
+        for url, (label, probability) in zip(urls, decisions):
+            if isinstance(url, str) and probability is None:
+                failures.append(f"{url!r} was not scored")
+            if not isinstance(url, str) and (label, probability) != (None, None):
+                failures.append(f"{url!r} was not escalated: {(label, probability)}")
+            print(f"{url!r:<75} {label!s:>5} {'-' if probability is None else f'{probability:.3f}':>7}")
+
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    print(f"Failures: {len(failures)}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
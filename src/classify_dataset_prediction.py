@@ -1,54 +1,205 @@
 import os
+import json
+import glob
+import errno
 import shutil
-import re
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sql_index import iter_records
 
 # CẤU HÌNH
 SQL_FILE = "D://PTIT/Datn/Code/anti-phishing/dataset_for_prediction/index.sql"                      # file .sql chứa 80000 bản ghi
 HTML_FOLDER = "D://PTIT/Datn/Code/anti-phishing/dataset_for_prediction/dataset-part-8"              # thư mục chứa các file .html
 BENIGN_FOLDER = "D://PTIT/Datn/Code/anti-phishing/dataset_for_prediction/benign_websites"           # output cho result = 0
 PHISHING_FOLDER = "D://PTIT/Datn/Code/anti-phishing/dataset_for_prediction/phishing_websites"       # output cho result = 1
+MANIFEST_FILE = "D://PTIT/Datn/Code/anti-phishing/dataset_for_prediction/classify_manifest.jsonl"   # các file đã phân loại
 
-# BƯỚC 1: Đọc file SQL và parse các bản ghi
-pattern = re.compile(
-    r"\(\s*([0-9]+)\s*,\s*'((?:\\'|[^'])*)'\s*,\s*'((?:\\'|[^'])*)'\s*,\s*([01])\s*,\s*'((?:\\'|[^'])*)'\s*\)"
-)
+# Manifest: một dòng JSON cho mỗi file đã được đặt vào thư mục đích, ghi ngay sau khi đặt xong
+# nên chạy lại sau khi bị ngắt sẽ tiếp tục từ chỗ dừng. Dòng sau ghi đè dòng trước cùng tên file.
 
-mapping = {}   # key: filename.html → value: result (0/1)
+def load_manifest(path):
+    entries = {}
+    if not os.path.exists(path):
+        return entries, 0
+    lines = 0
+    line = "\n"
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # dòng cuối bị cắt dở khi tiến trình bị ngắt
+            entries[entry["file"]] = entry
+            lines += 1
+    if not line.endswith("\n"):
+        # Kết thúc dòng bị cắt dở để các dòng ghi tiếp theo không bị dính vào nó
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n")
+    return entries, lines
 
-with open(SQL_FILE, "r", encoding="utf-8", errors="ignore") as f:
-    content = f.read()
+def compact_manifest(path, entries):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for entry in entries.values():
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(temp_path, path)
 
-matches = pattern.findall(content)
+def list_sources(patterns):
+    # filename.html → đường dẫn, từ tất cả các thư mục nguồn (dataset-part-*)
+    available = {}
+    for pattern in patterns:
+        for folder in sorted(glob.glob(pattern)) or [pattern]:
+            if not os.path.isdir(folder):
+                print(f"Bỏ qua {folder}: không phải thư mục")
+                continue
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".html") and entry.is_file():
+                        available[entry.name] = entry.path
+    return available
 
-for rec_id, url, website, result, created_date in matches:
-    mapping[website.strip()] = int(result)
+def same_file(path, other):
+    try:
+        return os.path.samefile(path, other)
+    except OSError:
+        return False
 
-print(f"Đã load {len(mapping)} bản ghi từ file SQL.")
+def place(source, target, mode):
+    # Idempotent: chạy lại trên file đã đặt xong không làm gì, file đích đang dở được ghi đè.
+    # link: hardlink (cùng ổ đĩa), tự chuyển sang copy khi khác ổ đĩa.
+    if same_file(source, target):
+        if mode == "move":
+            os.remove(source)
+        return
+    temp_path = f"{target}.part{os.getpid()}"
+    if mode == "move":
+        try:
+            os.replace(source, target)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        shutil.copy2(source, temp_path)
+        os.replace(temp_path, target)
+        os.remove(source)
+        return
+    if mode == "link":
+        try:
+            if os.path.lexists(target):
+                os.remove(target)
+            os.link(source, target)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+    shutil.copy2(source, temp_path)
+    os.replace(temp_path, target)
 
-# BƯỚC 2: Duyệt thư mục HTML và so sánh
-count_phishing = 0
-count_benign = 0
-count_not_found = 0
+def apply(task, folders, mode):
+    filename, result, old_result, source = task["file"], task["result"], task["old_result"], task["source"]
+    target = os.path.join(folders[result], filename)
+    if source is not None:
+        place(source, target, mode)
+    elif os.path.exists(os.path.join(folders[old_result], filename)):
+        # Nhãn của bản ghi đã đổi, file không còn ở thư mục nguồn: chuyển giữa hai thư mục đích
+        os.replace(os.path.join(folders[old_result], filename), target)
+        return
+    if old_result is not None and old_result != result:
+        stale = os.path.join(folders[old_result], filename)
+        if os.path.lexists(stale):
+            os.remove(stale)
 
-for filename in os.listdir(HTML_FOLDER):
-    if not filename.endswith(".html"):
-        continue
+def classify(args):
+    folders = {0: args.benign, 1: args.phishing}
+    for folder in folders.values():
+        os.makedirs(folder, exist_ok=True)
 
-    filepath = os.path.join(HTML_FOLDER, filename)
+    manifest, manifest_lines = load_manifest(args.manifest)
+    available = list_sources(args.sources)
+    print(f"{len(available)} file .html trong thư mục nguồn, {len(manifest)} file trong manifest.")
 
-    if filename in mapping:
-        result = mapping[filename]
+    # BƯỚC 1: Đọc file SQL theo từng khối; chỉ giữ nhãn của các file có mặt ở thư mục nguồn
+    # hoặc trong manifest, bản ghi sau ghi đè bản ghi trước như khi dùng dict toàn bộ
+    labels = {}
+    records = 0
+    for rec_id, _, website, result, _ in iter_records(args.sql):
+        records += 1
+        if website in available or website in manifest:
+            labels[website] = (result, rec_id)
+    print(f"Đã đọc {records} bản ghi từ file SQL.")
 
-        if result == 1:
-            shutil.move(filepath, os.path.join(PHISHING_FOLDER, filename))
-            count_phishing += 1
-        else:
-            shutil.move(filepath, os.path.join(BENIGN_FOLDER, filename))
-            count_benign += 1
-    else:
-        count_not_found += 1
+    # BƯỚC 2: Chọn các file mới hoặc đã thay đổi
+    tasks = []
+    unchanged = 0
+    for filename, (result, rec_id) in labels.items():
+        target = os.path.join(folders[result], filename)
+        entry = manifest.get(filename)
+        source = available.get(filename)
+        old_result = entry["result"] if entry else None
 
-print("=== KẾT QUẢ ===")
-print("Phishing files:", count_phishing)
-print("Benign files:", count_benign)
-print("Không tìm thấy trong SQL:", count_not_found)
\ No newline at end of file
+        if source is None:
+            if old_result != result:
+                tasks.append({"file": filename, "result": result, "id": rec_id, "old_result": old_result,
+                              "source": None, "size": entry["size"], "mtime_ns": entry["mtime_ns"]})
+            else:
+                unchanged += 1
+            continue
+
+        stat = os.stat(source)
+        if (not args.force and old_result == result and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns and os.path.exists(target)):
+            unchanged += 1
+            if args.mode == "move" and not same_file(source, target):
+                os.remove(source)  # bản sao giống hệt file đã phân loại
+            continue
+        tasks.append({"file": filename, "result": result, "id": rec_id, "old_result": old_result,
+                      "source": source, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+
+    # BƯỚC 3: Đặt file song song; mỗi file xong được ghi ngay vào manifest
+    counts = {0: 0, 1: 0}
+    failed = 0
+    with open(args.manifest, "a", encoding="utf-8") as manifest_file, \
+            ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(apply, task, folders, args.mode): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                future.result()
+            except OSError as e:
+                failed += 1
+                print(f"Lỗi khi xử lý {task['file']}: {e}")
+                continue
+            manifest[task["file"]] = {key: task[key] for key in ("file", "result", "id", "size", "mtime_ns")}
+            manifest_file.write(json.dumps(manifest[task["file"]], ensure_ascii=False) + "\n")
+            manifest_file.flush()
+            manifest_lines += 1
+            counts[task["result"]] += 1
+
+    if manifest_lines > 2 * len(manifest):
+        compact_manifest(args.manifest, manifest)
+
+    print("=== KẾT QUẢ ===")
+    print("Phishing files:", counts[1])
+    print("Benign files:", counts[0])
+    print("Không đổi (đã có trong manifest):", unchanged)
+    print("Không tìm thấy trong SQL:", sum(1 for filename in available if filename not in labels))
+    if failed:
+        print("Lỗi:", failed)
+
+def main():
+    parser = argparse.ArgumentParser(description='Sort the prediction dataset pages into benign/phishing folders using index.sql.')
+    parser.add_argument('--sql', default=SQL_FILE)
+    parser.add_argument('--sources', nargs='+', default=[HTML_FOLDER],
+                        help='Folders of .html pages; glob patterns such as "dataset-part-*" are expanded.')
+    parser.add_argument('--benign', default=BENIGN_FOLDER)
+    parser.add_argument('--phishing', default=PHISHING_FOLDER)
+    parser.add_argument('--manifest', default=MANIFEST_FILE)
+    parser.add_argument('--mode', choices=['move', 'link', 'copy'], default='move',
+                        help='link keeps the sources and hardlinks them (copies across filesystems).')
+    parser.add_argument('--workers', type=int, default=8, help='Files placed in parallel.')
+    parser.add_argument('--force', action='store_true', help='Place every file again, ignoring the manifest.')
+    args = parser.parse_args()
+    classify(args)
+
+if __name__ == "__main__":
+    main()
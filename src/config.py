@@ -0,0 +1,95 @@
+import os
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Micro-batching scheduler used by /check_url
+BATCHING_ENABLED = env_bool("ANTIPHISHING_BATCHING", True)
+MAX_BATCH_SIZE = env_int("ANTIPHISHING_MAX_BATCH_SIZE", 16)
+MAX_WAIT_MS = env_float("ANTIPHISHING_MAX_WAIT_MS", 10.0)
+
+# Stop extracting page features once the model's max_length tokens are filled
+EXTRACTION_EARLY_STOP = env_bool("ANTIPHISHING_EXTRACTION_EARLY_STOP", True)
+
+# Checkbox labels: the <label for="id"> of the checkbox first, then the next <label>. Off keeps
+# the next-<label> text the current model was trained on; turning it on needs re-extraction and retraining.
+EXTRACTION_LABEL_FOR_ID = env_bool("ANTIPHISHING_LABEL_FOR_ID", False)
+
+# Long pages: score up to SCORING_WINDOWS overlapping 128-token windows of the extracted text in
+# one forward pass and pool them (max, mean or attention). 1 scores only the first window.
+SCORING_WINDOWS = env_int("ANTIPHISHING_WINDOWS", 1)
+WINDOW_STRIDE = env_int("ANTIPHISHING_WINDOW_STRIDE", 32)
+WINDOW_POOLING = os.environ.get("ANTIPHISHING_WINDOW_POOLING", "max")
+
+# Domain allow/block lists checked before the cache and the model (reputation.py); a file is
+# re-read at most every RELOAD_SECONDS after it changes
+REPUTATION_ALLOW_FILE = os.environ.get("ANTIPHISHING_ALLOW_LIST") or None
+REPUTATION_BLOCK_FILE = os.environ.get("ANTIPHISHING_BLOCK_LIST") or None
+REPUTATION_RELOAD_SECONDS = env_float("ANTIPHISHING_REPUTATION_RELOAD_SECONDS", 5.0)
+
+# URL-only first stage (train_url_model.py): confident verdicts skip the page fetch and MobileBERT,
+# the rest are escalated. None turns the cascade off.
+URL_MODEL_PATH = os.environ.get("ANTIPHISHING_URL_MODEL") or None
+
+# Bulk endpoint /check_urls: items per request, concurrent page downloads and texts per model batch
+BULK_MAX_ITEMS = env_int("ANTIPHISHING_BULK_MAX_ITEMS", 500)
+BULK_FETCH_CONCURRENCY = env_int("ANTIPHISHING_BULK_FETCH_CONCURRENCY", 32)
+BULK_BATCH_SIZE = env_int("ANTIPHISHING_BULK_BATCH_SIZE", 64)
+
+# Print one JSON line with the stage timings of every /check_url request (/metrics is always on)
+TIMING_LOG = env_bool("ANTIPHISHING_TIMING_LOG", False)
+
+# Inference backend: torch, torch-int8, onnx or onnx-int8 (ONNX files come from export_model.py)
+INFERENCE_BACKEND = os.environ.get("ANTIPHISHING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.environ.get("ANTIPHISHING_ONNX_DIR") or None
+
+# Server-side verdict cache
+CACHE_ENABLED = env_bool("ANTIPHISHING_CACHE", True)
+CACHE_MAX_ENTRIES = env_int("ANTIPHISHING_CACHE_MAX_ENTRIES", 10000)
+CACHE_TTL_SECONDS = env_float("ANTIPHISHING_CACHE_TTL_SECONDS", 3600.0)
+# Also key on a hash of the fetched HTML so a changed page is scored again
+CACHE_KEY_CONTENT = env_bool("ANTIPHISHING_CACHE_KEY_CONTENT", False)
+CACHE_FILE = os.environ.get("ANTIPHISHING_CACHE_FILE") or None
+CACHE_SAVE_INTERVAL = env_float("ANTIPHISHING_CACHE_SAVE_INTERVAL", 60.0)
+
+# Page HTML sent by the extension: decompressed size cap and whole request size cap
+MAX_PAGE_BYTES = env_int("ANTIPHISHING_MAX_PAGE_BYTES", 2 * 1024 * 1024)
+MAX_REQUEST_BYTES = env_int("ANTIPHISHING_MAX_REQUEST_BYTES", 8 * 1024 * 1024)
+
+# Async server (asgi_app.py): pooled HTTP client and threads for extraction + inference
+FETCH_MAX_CONNECTIONS = env_int("ANTIPHISHING_FETCH_MAX_CONNECTIONS", 100)
+FETCH_MAX_KEEPALIVE = env_int("ANTIPHISHING_FETCH_MAX_KEEPALIVE", 20)
+INFERENCE_THREADS = env_int("ANTIPHISHING_INFERENCE_THREADS", 4)
+
+# Server-side page download: timeout and byte cap (the read also stops at the token budget)
+FETCH_TIMEOUT = env_float("ANTIPHISHING_FETCH_TIMEOUT", 10.0)
+FETCH_MAX_BYTES = env_int("ANTIPHISHING_FETCH_MAX_BYTES", 2 * 1024 * 1024)
+
+# Pre-fork server (prefork_server.py): worker processes and torch threads per worker
+# (0 = CPU cores divided by the number of workers, so the workers do not oversubscribe the cores)
+SERVING_WORKERS = env_int("ANTIPHISHING_WORKERS", 2)
+TORCH_THREADS_PER_WORKER = env_int("ANTIPHISHING_TORCH_THREADS", 0)
+SERVING_HOST = os.environ.get("ANTIPHISHING_HOST", "127.0.0.1")
+SERVING_PORT = env_int("ANTIPHISHING_PORT", 5024)
+
+# Model folder and startup: with background loading the port is bound at once and /health
+# reports "warming" until the model is loaded and warmed up; /check_url waits up to
+# READY_WAIT_SECONDS for it
+MODEL_PATH = os.environ.get("ANTIPHISHING_MODEL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "model"))
+BACKGROUND_LOAD = env_bool("ANTIPHISHING_BACKGROUND_LOAD", True)
+READY_WAIT_SECONDS = env_float("ANTIPHISHING_READY_WAIT", 30.0)
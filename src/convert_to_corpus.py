@@ -0,0 +1,45 @@
+import os
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import corpus
+
+DEFAULT_PHISHING_DIR = 'D://PTIT/Datn/Code/anti-phishing/data_for_training/phishing_samples'
+DEFAULT_BENIGN_DIR = 'D://PTIT/Datn/Code/anti-phishing/data_for_training/benign_samples'
+DEFAULT_CORPUS_DIR = 'D://PTIT/Datn/Code/anti-phishing/data_for_training/corpus'
+
+def read_text(path):
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+def convert_folder(folder, label, corpus_dir, shard_rows, format):
+    filenames = sorted(f for f in os.listdir(folder) if f.endswith(".txt"))
+    paths = [os.path.join(folder, f) for f in filenames]
+
+    with corpus.ShardWriter(corpus_dir, shard_rows=shard_rows, format=format, prefix=label) as writer:
+        # Reading is I/O bound, so threads keep the disk busy while shards are written in order
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for filename, path, text in zip(filenames, paths, executor.map(read_text, paths)):
+                writer.add(filename, corpus.LABELS[label], path, text)
+    print(f"{label}: {writer.total_rows} files -> {len(writer.shards)} shards")
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert the per-page .txt sample folders into a sharded Parquet/Arrow corpus.')
+    parser.add_argument('--phishing-dir', default=DEFAULT_PHISHING_DIR)
+    parser.add_argument('--benign-dir', default=DEFAULT_BENIGN_DIR)
+    parser.add_argument('--output', default=DEFAULT_CORPUS_DIR, help='Corpus folder to write the shards to.')
+    parser.add_argument('--format', choices=sorted(corpus.FORMATS), default='parquet')
+    parser.add_argument('--shard-rows', type=int, default=5000, help='Rows per shard.')
+    args = parser.parse_args()
+
+    if os.path.isdir(args.output) and corpus.list_shards(args.output):
+        print(f"The folder {args.output} already contains shards, choose an empty folder.")
+        return
+
+    for label, folder in (("phishing", args.phishing_dir), ("benign", args.benign_dir)):
+        if os.path.exists(folder):
+            convert_folder(folder, label, args.output, args.shard_rows, args.format)
+        else:
+            print(f"The folder {folder} does not exist.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import os
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# One row per page: the extracted text together with where it came from
+SCHEMA = pa.schema([
+    ("filename", pa.string()),
+    ("label", pa.int8()),
+    ("source_path", pa.string()),
+    ("text", pa.string()),
+])
+
+LABELS = {"benign": 0, "phishing": 1}
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+class ShardWriter:
+    # Buffers rows and writes them out as numbered shards of at most shard_rows rows.
+    # Parquet is compressed and smaller; Arrow IPC files can be memory-mapped without decoding.
+
+    def __init__(self, output_dir, shard_rows=5000, format="parquet", prefix="part"):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown corpus format: {format}")
+        self.output_dir = output_dir
+        self.shard_rows = shard_rows
+        self.format = format
+        self.prefix = prefix
+        self.rows = {name: [] for name in SCHEMA.names}
+        self.shards = []
+        self.total_rows = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, filename, label, source_path, text):
+        self.rows["filename"].append(filename)
+        self.rows["label"].append(label)
+        self.rows["source_path"].append(source_path)
+        self.rows["text"].append(text)
+        if len(self.rows["filename"]) >= self.shard_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.rows["filename"]:
+            return
+        table = pa.table(self.rows, schema=SCHEMA)
+        path = os.path.join(self.output_dir, f"{self.prefix}-{len(self.shards):05d}{FORMATS[self.format]}")
+        temp_path = path + ".tmp"
+        if self.format == "parquet":
+            pq.write_table(table, temp_path, compression="zstd")
+        else:
+            with pa.OSFile(temp_path, "wb") as sink, ipc.new_file(sink, SCHEMA) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+
+        self.shards.append(path)
+        self.total_rows += table.num_rows
+        self.rows = {name: [] for name in SCHEMA.names}
+
+    def close(self):
+        self.flush()
+        return self.shards
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+def list_shards(path):
+    if os.path.isfile(path):
+        return [path]
+    extensions = tuple(FORMATS.values())
+    return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(extensions)]
+
+def read_shard(path, columns=None, label=None):
+    # The label column is read for filtering even when it is not asked for
+    read_columns = columns
+    if columns and label is not None and "label" not in columns:
+        read_columns = list(columns) + ["label"]
+
+    if path.endswith(FORMATS["arrow"]):
+        # Zero-copy: the returned table points into the memory-mapped file
+        table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+        if read_columns:
+            table = table.select(read_columns)
+    else:
+        table = pq.read_table(path, columns=read_columns, memory_map=True)
+
+    if label is not None:
+        table = table.filter(pc.equal(table["label"], LABELS.get(label, label)))
+    return table.select(columns) if columns else table
+
+def read_corpus(path, columns=None, label=None):
+    shards = list_shards(path)
+    if not shards:
+        raise FileNotFoundError(f"No corpus shards in {path}")
+    return pa.concat_tables([read_shard(shard, columns, label) for shard in shards])
+
+def iter_corpus(path, columns=None, label=None):
+    # Shard by shard, so prediction over a large corpus only holds one shard in memory
+    for shard in list_shards(path):
+        yield from read_shard(shard, columns, label).to_pylist()
@@ -0,0 +1,67 @@
+import os
+import json
+import shutil
+import xxhash
+from datasets import Dataset, load_from_disk
+
+DEFAULT_CACHE_DIR = "./tokenized_cache"
+
+def corpus_fingerprint(df, columns=("file", "label", "text")):
+    # Hash of the rows in order: the split depends on the order as well as on the content
+    digest = xxhash.xxh3_128()
+    for row in zip(*(df[column] for column in columns)):
+        for value in row:
+            digest.update(str(value).encode("utf-8", errors="surrogatepass"))
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+def tokenizer_fingerprint(tokenizer):
+    if getattr(tokenizer, "is_fast", False):
+        # The serialized tokenizer includes the truncation/padding of the last call, so hash
+        # a copy with both cleared
+        from tokenizers import Tokenizer
+        backend = Tokenizer.from_str(tokenizer.backend_tokenizer.to_str())
+        backend.no_truncation()
+        backend.no_padding()
+        return xxhash.xxh3_64(backend.to_str().encode("utf-8")).hexdigest()
+    vocab = json.dumps(tokenizer.get_vocab(), sort_keys=True)
+    return xxhash.xxh3_64(vocab.encode("utf-8")).hexdigest()
+
+def cache_key(tokenizer, max_length, seed, corpus_hash, extra=None):
+    params = {
+        "tokenizer": tokenizer_fingerprint(tokenizer),
+        "max_length": max_length,
+        "seed": seed,
+        "corpus": corpus_hash,
+        **(extra or {}),
+    }
+    key = xxhash.xxh3_64(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+    return key, params
+
+def load_or_tokenize(splits, tokenize_function, tokenizer, max_length, seed, corpus_hash,
+                     cache_dir=DEFAULT_CACHE_DIR, extra=None):
+    # splits: {"train": df, "val": df, ...}. Cached splits are memory-mapped Arrow files;
+    # extra holds anything else that changes the tokenized output (e.g. the padding mode).
+    key, params = cache_key(tokenizer, max_length, seed, corpus_hash, extra)
+    path = os.path.join(cache_dir, key)
+
+    if os.path.exists(os.path.join(path, "params.json")):
+        print(f"Loading tokenized datasets from cache {path}")
+        return {name: load_from_disk(os.path.join(path, name)) for name in splits}
+
+    print("Tokenizing datasets...")
+    datasets = {}
+    for name, df in splits.items():
+        datasets[name] = Dataset.from_pandas(df).map(tokenize_function, batched=True)
+
+    # Written to a temporary folder and renamed, so an interrupted run leaves no half cache behind
+    temp_path = path + ".tmp"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    for name, dataset in datasets.items():
+        dataset.save_to_disk(os.path.join(temp_path, name))
+    with open(os.path.join(temp_path, "params.json"), "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(temp_path, path)
+
+    return {name: load_from_disk(os.path.join(path, name)) for name in splits}
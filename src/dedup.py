@@ -0,0 +1,283 @@
+import os
+import re
+import time
+import sqlite3
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import xxhash
+
+DEFAULT_INDEX = "dedup_index.sqlite"
+DEFAULT_FOLDERS = [
+    "phishing=D://PTIT/Datn/Code/anti-phishing/dataset_for_training/phishing_websites",
+    "benign=D://PTIT/Datn/Code/anti-phishing/dataset_for_training/benign_websites",
+]
+LABELS = {"benign": 0, "phishing": 1}
+PAGE_EXTENSIONS = (".html", ".htm", ".txt")
+
+# Near duplicates: pages whose extracted text shares at least JACCARD_THRESHOLD of its word
+# 3-gram shingles, estimated with a 64-value MinHash and found through 16 LSH bands of 4 values
+JACCARD_THRESHOLD = 0.8
+PERMUTATIONS = 64
+BANDS = 16
+SHINGLE = 3
+MIN_SHINGLES = 8
+_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, (1 << 61) - 1, size=PERMUTATIONS, dtype=np.uint64)
+_B = _rng.randint(0, (1 << 61) - 1, size=PERMUTATIONS, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    path TEXT PRIMARY KEY,
+    label INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    raw_hash TEXT NOT NULL,
+    text_hash TEXT,
+    minhash BLOB,
+    extract_ms REAL,
+    group_id TEXT
+)
+"""
+
+def raw_hash(data):
+    return xxhash.xxh3_128_hexdigest(data)
+
+def text_hash(text):
+    # Whitespace and case do not make two extractions different
+    normalized = " ".join(text.lower().split())
+    return xxhash.xxh3_128_hexdigest(normalized.encode("utf-8", errors="ignore")) if normalized else None
+
+def minhash(text):
+    words = _WORD.findall(text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE]) for i in range(max(len(words) - SHINGLE + 1, 0))}
+    if len(shingles) < MIN_SHINGLES:
+        return None  # too little text to call two pages near-identical
+    hashes = np.array([xxhash.xxh32_intdigest(shingle.encode("utf-8")) for shingle in shingles], dtype=np.uint64)
+    # (a * h + b) mod p with the product wrapping at 2^64, as datasketch does; the wrap mixes
+    # the bits, without it a short-hashed shingle would win most permutations
+    signature = ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+    return (signature & np.uint64(0xFFFFFFFF)).astype("<u4").tobytes()
+
+def raw_digest(path):
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        return path, stat.st_size, stat.st_mtime_ns, raw_hash(f.read())
+
+def text_digest(path):
+    # Runs in a worker process: the same read and extraction parsing_html.py does
+    from parsing_html import fetch_website_content
+    from extractor import generate_text_representation
+
+    start = time.perf_counter()
+    html_content = fetch_website_content(path)
+    text = generate_text_representation(html_content) if html_content else ""
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return path, text_hash(text), minhash(text), elapsed_ms
+
+def parse_folders(specs):
+    folders = []
+    for spec in specs:
+        label, _, path = spec.partition("=")
+        if label not in LABELS or not path:
+            raise SystemExit(f"Expected label=folder with label benign or phishing, got {spec}")
+        folders.append((LABELS[label], path.rstrip("/\\")))
+    return folders
+
+def list_pages(folders):
+    pages = {}
+    for label, folder in folders:
+        if not os.path.isdir(folder):
+            print(f"The folder {folder} does not exist.")
+            continue
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.endswith(PAGE_EXTENSIONS) and entry.is_file():
+                    pages[entry.path] = label
+    return pages
+
+def run(function, items, workers, chunksize=32):
+    if workers > 1 and len(items) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(function, items, chunksize=chunksize))
+    return [function(item) for item in items]
+
+def open_index(path):
+    connection = sqlite3.connect(path)
+    connection.execute(SCHEMA)
+    return connection
+
+def update_index(connection, folders, workers):
+    # Only new or modified files are hashed; a file whose raw bytes match an indexed page
+    # reuses that page's text hashes instead of being extracted again
+    pages = list_pages(folders)
+    known = {path: (size, mtime_ns) for path, size, mtime_ns in connection.execute("SELECT path, size, mtime_ns FROM pages")}
+    scanned = {folder for _, folder in folders}
+    removed = [path for path in known if path not in pages and os.path.dirname(path) in scanned]
+    connection.executemany("DELETE FROM pages WHERE path = ?", [(path,) for path in removed])
+
+    changed = []
+    for path in pages:
+        stat = os.stat(path)
+        if known.get(path) != (stat.st_size, stat.st_mtime_ns):
+            changed.append(path)
+    raw = run(raw_digest, changed, workers)
+
+    texts = {row[0]: row[1:] for row in connection.execute(
+        "SELECT raw_hash, text_hash, minhash, extract_ms FROM pages WHERE extract_ms IS NOT NULL")}
+    digests = {path: digest for path, _, _, digest in raw}
+    to_extract = {}
+    for path, digest in digests.items():
+        if digest not in texts:
+            to_extract.setdefault(digest, path)
+    for path, page_text_hash, page_minhash, extract_ms in run(text_digest, list(to_extract.values()), workers):
+        texts[digests[path]] = (page_text_hash, page_minhash, extract_ms)
+
+    connection.executemany(
+        "INSERT OR REPLACE INTO pages (path, label, file, size, mtime_ns, raw_hash, text_hash, minhash, extract_ms) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(path, pages[path], os.path.basename(path), size, mtime_ns, digest, *texts[digest]) for path, size, mtime_ns, digest in raw]
+    )
+    connection.commit()
+    return len(changed), len(to_extract), len(removed)
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+            return True
+        return False
+
+def group_pages(rows, threshold=JACCARD_THRESHOLD):
+    # rows: (path, raw_hash, text_hash, minhash) sorted by path; returns the group of each row
+    # (the path of its first member) and how many rows each rule merged
+    groups = UnionFind(len(rows))
+    merged = {"raw": 0, "text": 0, "near": 0}
+
+    for rule, column in (("raw", 1), ("text", 2)):
+        first = {}
+        for index, row in enumerate(rows):
+            if row[column] is not None:
+                merged[rule] += groups.union(first.setdefault(row[column], index), index)
+
+    # Identical signatures first, so copies of one kit page are compared only once
+    by_signature = {}
+    for index, row in enumerate(rows):
+        if row[3] is not None:
+            signature = bytes(row[3])
+            if signature in by_signature:
+                merged["near"] += groups.union(by_signature[signature], index)
+            else:
+                by_signature[signature] = index
+    if not by_signature:
+        return [rows[groups.find(index)][0] for index in range(len(rows))], merged
+
+    indexes = list(by_signature.values())
+    signatures = np.frombuffer(b"".join(by_signature), dtype="<u4").reshape(len(indexes), PERMUTATIONS)
+    rows_per_band = PERMUTATIONS // BANDS
+    for band in range(BANDS):
+        buckets = {}
+        for position, key in enumerate(signatures[:, band * rows_per_band:(band + 1) * rows_per_band]):
+            buckets.setdefault(key.tobytes(), []).append(position)
+        for members in buckets.values():
+            for i, a in enumerate(members):
+                if len(members) - i > 1:
+                    similarity = (signatures[members[i + 1:]] == signatures[a]).mean(axis=1)
+                    for b in np.asarray(members[i + 1:])[similarity >= threshold]:
+                        merged["near"] += groups.union(indexes[a], indexes[b])
+
+    return [rows[groups.find(index)][0] for index in range(len(rows))], merged
+
+def regroup(connection, threshold=JACCARD_THRESHOLD):
+    rows = connection.execute("SELECT path, raw_hash, text_hash, minhash FROM pages ORDER BY path").fetchall()
+    group_ids, merged = group_pages(rows, threshold)
+    connection.executemany("UPDATE pages SET group_id = ? WHERE path = ?",
+                           [(group_id, row[0]) for group_id, row in zip(group_ids, rows)])
+    connection.commit()
+    return merged
+
+def load_groups(index_path):
+    # (label, sample name) → group; sample names are the page's base name + .txt, as written
+    # by parsing_html.py and stored in the corpus shards
+    connection = open_index(index_path)
+    try:
+        return {(label, os.path.splitext(file)[0] + ".txt"): group_id
+                for label, file, group_id in connection.execute("SELECT label, file, group_id FROM pages")}
+    finally:
+        connection.close()
+
+def assign_groups(df, groups):
+    # Samples missing from the index are their own group
+    return [groups.get((label, file), f"{label}/{file}") for label, file in zip(df['label'], df['file'])]
+
+def group_train_test_split(df, test_size, random_state, groups, stratify):
+    # Like train_test_split(stratify=...), but every group ends up on one side only:
+    # the first fold of a shuffled StratifiedGroupKFold with 1/test_size folds
+    from sklearn.model_selection import StratifiedGroupKFold
+    splitter = StratifiedGroupKFold(n_splits=max(2, round(1 / test_size)), shuffle=True, random_state=random_state)
+    train_index, test_index = next(splitter.split(df, stratify, groups))
+    return df.iloc[train_index], df.iloc[test_index]
+
+def report(connection, merged, threshold=JACCARD_THRESHOLD):
+    total, extract_ms = connection.execute("SELECT COUNT(*), AVG(extract_ms) FROM pages").fetchone()
+    if not total:
+        print("No pages indexed.")
+        return
+    print(f"\n{'label':<10}{'pages':>8}{'groups':>8}{'shrinkage':>11}")
+    for name, label in sorted(LABELS.items(), key=lambda item: item[1]):
+        pages, groups = connection.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT group_id) FROM pages WHERE label = ?", (label,)).fetchone()
+        if pages:
+            print(f"{name:<10}{pages:>8}{groups:>8}{(1 - groups / pages) * 100:>10.1f}%")
+    groups = connection.execute("SELECT COUNT(DISTINCT group_id) FROM pages").fetchone()[0]
+    mixed = connection.execute(
+        "SELECT COUNT(*) FROM (SELECT group_id FROM pages GROUP BY group_id HAVING COUNT(DISTINCT label) > 1)").fetchone()[0]
+    print(f"{'all':<10}{total:>8}{groups:>8}{(1 - groups / total) * 100:>10.1f}%")
+    print(f"\nMerged by identical raw HTML: {merged['raw']}, identical extracted text: {merged['text']}, "
+          f"MinHash Jaccard >= {threshold}: {merged['near']}")
+    if mixed:
+        print(f"{mixed} groups hold both benign and phishing pages")
+
+    # Extraction and every training epoch scale with the number of pages kept
+    extract_ms = extract_ms or 0.0
+    print(f"Keeping one page per group: {total - groups} pages fewer to extract "
+          f"(~{(total - groups) * extract_ms / 1000:.1f}s at {extract_ms:.1f} ms/page measured), "
+          f"training epochs {total / groups:.2f}x faster")
+
+def main():
+    parser = argparse.ArgumentParser(description='Content-addressed duplicate index of the page corpora.')
+    parser.add_argument('--folders', nargs='+', default=DEFAULT_FOLDERS,
+                        help='label=folder pairs of raw pages, e.g. phishing=dataset_for_training/phishing_websites.')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help='SQLite index, updated in place.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threshold', type=float, default=JACCARD_THRESHOLD,
+                        help='Estimated shingle Jaccard similarity from which two pages are near duplicates.')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    connection = open_index(args.index)
+    try:
+        changed, extracted, removed = update_index(connection, parse_folders(args.folders), args.workers)
+        merged = regroup(connection, args.threshold)
+        print(f"Indexed {changed} new or changed pages ({extracted} extracted, the rest identical to indexed pages), "
+              f"removed {removed}, in {time.perf_counter() - start:.1f}s")
+        report(connection, merged, args.threshold)
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import os
+import csv
+import time
+import queue
+import argparse
+import threading
+import numpy as np
+import torch
+from tokenization import load_tokenizer, encode_batch, encode_windows
+from inference import BACKENDS, POOLINGS, load_backend, default_device, softmax, pool_windows
+
+DEFAULT_MODEL = "D://PTIT/Datn/Code/anti-phishing/src/model"
+DEFAULT_BENIGN_DIR = "D://PTIT/Datn/Code/anti-phishing/data_for_prediction/benign_samples"
+DEFAULT_PHISHING_DIR = "D://PTIT/Datn/Code/anti-phishing/data_for_prediction/phishing_samples"
+DEFAULT_OUTPUT_CSV = "D://PTIT/Datn/Code/anti-phishing/src/evaluation_results.csv"
+DEFAULT_OUTPUT_TXT = "D://PTIT/Datn/Code/anti-phishing/src/evaluation_summary.txt"
+
+LABEL_MAP = {0: 'benign', 1: 'phishing'}
+LABEL_IDS = {name: label for label, name in LABEL_MAP.items()}
+
+def read_file(file_path):
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+def iter_samples(label, folder=None, corpus_dir=None, max_files=None):
+    # (filename, label id, text), from the sharded corpus when one is given, else from the .txt folder
+    if corpus_dir:
+        from corpus import iter_corpus
+        samples = iter_corpus(corpus_dir, columns=["filename", "text"], label=label)
+        for idx, row in enumerate(samples):
+            if max_files is not None and idx >= max_files:
+                break
+            yield row["filename"], LABEL_IDS[label], row["text"]
+        return
+
+    for filename in sorted(os.listdir(folder))[:max_files]:
+        yield filename, LABEL_IDS[label], read_file(os.path.join(folder, filename))
+
+def pad_batch(encodings, indices, pad_token_id, tensor_type):
+    # Pads to the longest sample of this batch only, not to MAX_LENGTH
+    length = max(len(encodings["input_ids"][i]) for i in indices)
+    input_ids = np.full((len(indices), length), pad_token_id, dtype=np.int64)
+    attention_mask = np.zeros((len(indices), length), dtype=np.int64)
+    for row, i in enumerate(indices):
+        ids = encodings["input_ids"][i]
+        input_ids[row, :len(ids)] = ids
+        attention_mask[row, :len(ids)] = 1
+
+    inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+    if tensor_type == 'pt':
+        return {key: torch.from_numpy(value) for key, value in inputs.items()}
+    return inputs
+
+class BatchLoader(threading.Thread):
+    # Reads and tokenizes the next batches while the model runs on the current one.
+    # Samples are taken in windows; inside a window they are sorted by token count so each
+    # batch holds similar lengths and little padding. With windows > 1 every sample brings up to
+    # that many overlapping 128-token windows, all in the same batch.
+
+    def __init__(self, samples, tokenizer, tensor_type, batch_size, window, prefetch, windows=1, stride=32):
+        super().__init__(daemon=True)
+        self.samples = samples
+        self.tokenizer = tokenizer
+        self.tensor_type = tensor_type
+        self.batch_size = batch_size
+        self.window = window
+        self.windows = windows
+        self.stride = stride
+        self.batches = queue.Queue(maxsize=prefetch)
+        self.error = None
+
+    def run(self):
+        try:
+            pending = []
+            for sample in self.samples:
+                pending.append(sample)
+                if len(pending) >= self.window:
+                    self.load_window(pending)
+                    pending = []
+            if pending:
+                self.load_window(pending)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.batches.put(None)
+
+    def load_window(self, window):
+        texts = [text for _, _, text in window]
+        if self.windows > 1:
+            self.load_long_window(window, texts)
+            return
+        encodings = encode_batch(self.tokenizer, texts, return_tensors=None, padding=False)
+        order = sorted(range(len(window)), key=lambda i: len(encodings["input_ids"][i]))
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            inputs = pad_batch(encodings, indices, self.tokenizer.pad_token_id, self.tensor_type)
+            tokens = sum(len(encodings["input_ids"][i]) for i in indices)
+            metadata = [(window[i][0], window[i][1]) for i in indices]
+            self.batches.put((metadata, inputs, tokens, None))
+
+    def load_long_window(self, window, texts):
+        encodings, sample_index = encode_windows(self.tokenizer, texts, self.windows, self.stride,
+                                                 return_tensors=None, padding=False)
+        rows = [[] for _ in window]
+        for row, sample in enumerate(sample_index):
+            rows[sample].append(row)
+        lengths = [sum(len(encodings["input_ids"][row]) for row in sample_rows) for sample_rows in rows]
+        order = sorted(range(len(window)), key=lambda i: (len(rows[i]), lengths[i]))
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            batch_rows = [row for i in indices for row in rows[i]]
+            batch_index = [position for position, i in enumerate(indices) for _ in rows[i]]
+            inputs = pad_batch(encodings, batch_rows, self.tokenizer.pad_token_id, self.tensor_type)
+            metadata = [(window[i][0], window[i][1]) for i in indices]
+            self.batches.put((metadata, inputs, sum(lengths[i] for i in indices), batch_index))
+
+class Metrics:
+    # Phishing is the positive class
+    def __init__(self):
+        self.tp = self.fp = self.tn = self.fn = 0
+
+    def update(self, true_label, predicted_label):
+        if predicted_label == 1:
+            if true_label == 1:
+                self.tp += 1
+            else:
+                self.fp += 1
+        elif true_label == 1:
+            self.fn += 1
+        else:
+            self.tn += 1
+
+    def summary(self):
+        total = self.tp + self.fp + self.tn + self.fn
+        precision = self.tp / (self.tp + self.fp) if self.tp + self.fp else 0.0
+        recall = self.tp / (self.tp + self.fn) if self.tp + self.fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return {
+            "total": total,
+            "correct": self.tp + self.tn,
+            "incorrect": self.fp + self.fn,
+            "accuracy": (self.tp + self.tn) / total if total else 0.0,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+            "tp": self.tp, "fp": self.fp, "tn": self.tn, "fn": self.fn,
+        }
+
+def evaluate(backend, tokenizer, samples, output_csv, batch_size=64, window=4096, prefetch=4, log_every=500,
+             windows=1, stride=32, pooling="max"):
+    loader = BatchLoader(samples, tokenizer, backend.tensor_type, batch_size, window, prefetch, windows, stride)
+    metrics = Metrics()
+    model_seconds = 0.0
+    padded_tokens = 0
+    real_tokens = 0
+    model_rows = 0
+    start = time.perf_counter()
+    next_log = log_every
+
+    loader.start()
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["filename", "label", "prediction", "phishing_probability", "correct"])
+
+        while True:
+            item = loader.batches.get()
+            if item is None:
+                break
+            metadata, inputs, tokens, sample_index = item
+
+            model_start = time.perf_counter()
+            logits = backend.logits(inputs)
+            if sample_index is None:
+                probabilities = softmax(logits)
+            else:
+                probabilities = pool_windows(logits, sample_index, len(metadata), pooling)
+            model_seconds += time.perf_counter() - model_start
+            model_rows += inputs["input_ids"].shape[0]
+            real_tokens += tokens
+            padded_tokens += inputs["input_ids"].shape[0] * inputs["input_ids"].shape[1]
+
+            # Rows are streamed as soon as their batch is done, nothing is kept per file
+            for (filename, true_label), probs in zip(metadata, probabilities):
+                predicted_label = int(np.argmax(probs))
+                metrics.update(true_label, predicted_label)
+                writer.writerow([filename, LABEL_MAP[true_label], LABEL_MAP[predicted_label],
+                                 f"{probs[1]:.6f}", predicted_label == true_label])
+
+            done = metrics.tp + metrics.fp + metrics.tn + metrics.fn
+            if done >= next_log:
+                print(f"Processed {done} files ({done / (time.perf_counter() - start):.1f} samples/s)")
+                next_log += log_every
+    loader.join()
+    if loader.error is not None:
+        raise loader.error
+
+    elapsed = time.perf_counter() - start
+    summary = metrics.summary()
+    summary["seconds"] = elapsed
+    summary["samples_per_second"] = summary["total"] / elapsed if elapsed else 0.0
+    summary["model_samples_per_second"] = summary["total"] / model_seconds if model_seconds else 0.0
+    summary["padding_ratio"] = 1 - real_tokens / padded_tokens if padded_tokens else 0.0
+    summary["windows_per_sample"] = model_rows / summary["total"] if summary["total"] else 0.0
+    return summary
+
+def write_summary(path, summary):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Total files: {summary['total']}\n")
+        f.write(f"Correct predictions: {summary['correct']}\n")
+        f.write(f"Incorrect predictions: {summary['incorrect']}\n")
+        f.write(f"Accuracy: {summary['accuracy'] * 100:.2f}%\n")
+        f.write(f"Precision: {summary['precision']:.4f}\n")
+        f.write(f"Recall: {summary['recall']:.4f}\n")
+        f.write(f"F1 Score: {summary['f1']:.4f}\n")
+        f.write(f"Confusion (tp/fp/tn/fn): {summary['tp']}/{summary['fp']}/{summary['tn']}/{summary['fn']}\n")
+        f.write(f"Throughput: {summary['samples_per_second']:.1f} samples/s "
+                f"(model only {summary['model_samples_per_second']:.1f} samples/s)\n")
+        f.write(f"Padding: {summary['padding_ratio'] * 100:.1f}% of model input tokens\n")
+        f.write(f"Windows per sample: {summary['windows_per_sample']:.2f}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate the model on the benign and phishing prediction samples in batches.')
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--benign-dir', default=DEFAULT_BENIGN_DIR)
+    parser.add_argument('--phishing-dir', default=DEFAULT_PHISHING_DIR)
+    parser.add_argument('--corpus', help='Folder of corpus shards; used instead of the two sample folders.')
+    parser.add_argument('--labels', nargs='+', choices=sorted(LABEL_IDS), default=['benign', 'phishing'])
+    parser.add_argument('--max-files', type=int, default=10000, help='Maximum samples per label.')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch')
+    parser.add_argument('--device', default=default_device(), help='cpu or cuda (torch backend).')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--window', type=int, default=4096, help='Samples sorted by length together.')
+    parser.add_argument('--prefetch', type=int, default=4, help='Batches prepared ahead of the model.')
+    parser.add_argument('--windows', type=int, default=1, help='Overlapping 128-token windows scored per sample, 1 = first window only.')
+    parser.add_argument('--stride', type=int, default=32, help='Tokens shared by consecutive windows.')
+    parser.add_argument('--pooling', choices=POOLINGS, default='max', help='How the window scores are combined.')
+    parser.add_argument('--output-csv', default=DEFAULT_OUTPUT_CSV)
+    parser.add_argument('--output-txt', default=DEFAULT_OUTPUT_TXT)
+    args = parser.parse_args()
+
+    folders = {'benign': args.benign_dir, 'phishing': args.phishing_dir}
+    sources = []
+    for label in args.labels:
+        if not args.corpus and not os.path.isdir(folders[label]):
+            print(f"The folder {folders[label]} does not exist.")
+            return
+        sources.append(iter_samples(label, folders[label], args.corpus, args.max_files))
+
+    def samples():
+        for source in sources:
+            yield from source
+
+    backend = load_backend(args.backend, args.model, device=args.device)
+    tokenizer = load_tokenizer(args.model)
+
+    summary = evaluate(backend, tokenizer, samples(), args.output_csv,
+                       batch_size=args.batch_size, window=args.window, prefetch=args.prefetch,
+                       windows=args.windows, stride=args.stride, pooling=args.pooling)
+    write_summary(args.output_txt, summary)
+
+    print("Done!")
+    print(f"Accuracy : {summary['accuracy'] * 100:.2f}%")
+    print(f"Precision: {summary['precision']:.4f}")
+    print(f"Recall   : {summary['recall']:.4f}")
+    print(f"F1 Score : {summary['f1']:.4f}")
+    print(f"Throughput: {summary['samples_per_second']:.1f} samples/s")
+    print(f"CSV saved to: {args.output_csv}")
+    print(f"Summary saved to: {args.output_txt}")
+
+if __name__ == "__main__":
+    main()
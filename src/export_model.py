@@ -0,0 +1,71 @@
+import os
+import argparse
+import torch
+from transformers import MobileBertForSequenceClassification
+from inference import ONNX_FILENAME, ONNX_INT8_FILENAME, default_onnx_dir
+from tokenization import MAX_LENGTH, load_tokenizer, encode_batch
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model")
+
+class LogitsOnly(torch.nn.Module):
+    # ONNX export wants plain tensor outputs instead of a SequenceClassifierOutput
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+def export_onnx(model_path, onnx_path, opset):
+    model = MobileBertForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    tokenizer = load_tokenizer(model_path)
+    inputs = encode_batch(tokenizer, ["LINK: { text: \"example\", href: \"https://example.com\" }"] * 2)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            LogitsOnly(model),
+            (inputs["input_ids"], inputs["attention_mask"]),
+            onnx_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+            dynamo=False,
+        )
+
+def quantize_onnx(onnx_path, int8_path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the MobileBERT classifier to ONNX (fp32 and dynamic int8).')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Folder with the trained model.')
+    parser.add_argument('--output-dir', help='Where to write the ONNX files (default: model_onnx next to the model folder).')
+    parser.add_argument('--opset', type=int, default=14)
+    parser.add_argument('--no-int8', action='store_true', help='Skip writing the quantized model.')
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or default_onnx_dir(args.model)
+    os.makedirs(output_dir, exist_ok=True)
+
+    onnx_path = os.path.join(output_dir, ONNX_FILENAME)
+    print(f"Exporting {args.model} -> {onnx_path} (max_length {MAX_LENGTH}, opset {args.opset})")
+    export_onnx(args.model, onnx_path, args.opset)
+
+    if not args.no_int8:
+        int8_path = os.path.join(output_dir, ONNX_INT8_FILENAME)
+        print(f"Quantizing -> {int8_path}")
+        quantize_onnx(onnx_path, int8_path)
+
+    for filename in sorted(os.listdir(output_dir)):
+        size = os.path.getsize(os.path.join(output_dir, filename)) / 1048576
+        print(f"{filename}: {size:.1f} MB")
+
+if __name__ == "__main__":
+    main()
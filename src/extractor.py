@@ -0,0 +1,539 @@
+import re
+from lxml import etree
+import config
+
+# Field sources for the rule table below.
+def attr(*names, empty=""):
+    # First non-empty attribute among names, else empty
+    return ("attr", names, empty)
+
+def attr_as_is(name, missing):
+    # The attribute even when it is empty; missing only when it is absent
+    return ("attr_as_is", name, missing)
+
+def text(empty="<EMPTY>"):
+    # Whitespace-normalized text of the whole subtree, so the line is written when the element closes
+    return ("text", empty)
+
+def next_text(tag, missing="<EMPTY>", match=None):
+    # Text of the next <tag> element in the document (it may come after this element closes).
+    # With match, a <tag> whose match attribute equals this element's id is preferred, wherever it is.
+    return ("next_text", tag, missing, match)
+
+class Rule:
+    # One output line: a template with $field placeholders, the fields' sources and an optional
+    # condition on the attributes. A tag may have several rules; the first matching one is used.
+
+    def __init__(self, template, when=None, **fields):
+        self.template = template
+        self.when = when
+        self.fields = fields
+
+# Conditions for choosing between the rules of one tag.
+def has_attr(name):
+    return ("has_attr", name)
+
+def attr_equals(name, value):
+    return ("attr_equals", name, value)
+
+# Tag -> rules, in the order the model was trained on. Adding a tag (select, area, h1, ...) only
+# needs an entry here. The templates are kept byte-for-byte, including the unclosed IFRAME quote.
+EXTRACTION_RULES = {
+    "a": Rule('LINK: { text: "$text", href: "$href" }', text=text(), href=attr_as_is("href", "No URL provided")),
+    "form": Rule('FORM: { action: "$action", method: "$method" }', action=attr("action"), method=attr("method")),
+    "label": Rule('LABEL: { for: "$for", "text": "$text" }', **{"for": attr("for"), "text": text()}),
+    "input": [
+        Rule('CHECKBOX: { label: "$label", input: { type: "checkbox", name: "$name", placeholder: "$placeholder" } }',
+             when=attr_equals("type", "checkbox"),
+             label=next_text("label", match="for" if config.EXTRACTION_LABEL_FOR_ID else None), name=attr("name"), placeholder=attr("placeholder")),
+        Rule('INPUT: { type: "$type", name: "$name", placeholder: "$placeholder" }',
+             type=attr("type"), name=attr("name"), placeholder=attr("placeholder")),
+    ],
+    "button": Rule('BUTTON: { text: "$text" }', text=text()),
+    "iframe": Rule('IFRAME: { src: "$src }', src=attr("src")),
+    "script": [
+        Rule('SCRIPT: { src: "$src" }', when=has_attr("src"), src=attr("src")),
+        Rule('SCRIPT: { <SCRIPT INLINE> }'),
+    ],
+    "meta": Rule('META: { name: "$name", content: "$content" }', name=attr("name", "property"), content=attr("content", empty="<EMPTY>")),
+    "img": Rule('IMG: { src: "$src", alt: "$alt" }', src=attr("src"), alt=attr("alt", empty="<EMPTY>")),
+    "title": Rule('TITLE: { text: "$text" }', text=text()),
+    "p": Rule('P: { text: "$text" }', text=text()),
+    "header": Rule('HEADER: { text: "$text" }', text=text()),
+    "ul": Rule('UL: { text: "$text" }', text=text()),
+    "ol": Rule('OL: { text: "$text" }', text=text()),
+    "li": Rule('LI: { text: "$text" }', text=text()),
+    "noscript": Rule('NOSCRIPT: { text: "$text" }', text=text()),
+}
+
+_PLACEHOLDER = re.compile(r"\$(\w+)")
+
+class CompiledRule:
+    # The template becomes a %-format string and each field a small getter closure over the
+    # rule's parameters; rendering a line fills the format with the getters' values.
+
+    def __init__(self, rule):
+        names = _PLACEHOLDER.findall(rule.template)
+        missing = set(names) - set(rule.fields)
+        if missing:
+            raise ValueError(f"No source for template fields {sorted(missing)}: {rule.template}")
+        self.when = rule.when
+        self.sources = [rule.fields[name] for name in names]
+        self.uses_text = any(source[0] == "text" for source in self.sources)
+        waits = [source for source in self.sources if source[0] == "next_text"]
+        self.waits_for = waits[0][1] if waits else None
+        self.waiting_missing = waits[0][2] if waits else None
+        self.match = waits[0][3] if waits else None
+        self.render = _renderer(_PLACEHOLDER.sub("%s", rule.template.replace("%", "%%")),
+                                [_getter(source) for source in self.sources])
+
+def _renderer(line_format, getters):
+    # Rules have at most three fields; the common sizes avoid building the tuple in a loop
+    if not getters:
+        line = line_format % ()
+        return lambda attrs, text=None, waited=None: line
+    if len(getters) == 1:
+        (first,) = getters
+        return lambda attrs, text=None, waited=None: line_format % (first(attrs, text, waited),)
+    if len(getters) == 2:
+        first, second = getters
+        return lambda attrs, text=None, waited=None: line_format % (
+            first(attrs, text, waited), second(attrs, text, waited))
+    if len(getters) == 3:
+        first, second, third = getters
+        return lambda attrs, text=None, waited=None: line_format % (
+            first(attrs, text, waited), second(attrs, text, waited), third(attrs, text, waited))
+    return lambda attrs, text=None, waited=None: line_format % tuple(
+        getter(attrs, text, waited) for getter in getters)
+
+def _condition(when):
+    kind = when[0]
+    if kind == "has_attr":
+        name = when[1]
+        return lambda attrs: attrs.get(name)
+    if kind == "attr_equals":
+        name, value = when[1], when[2]
+        return lambda attrs: attrs.get(name) == value
+    raise ValueError(f"Unknown rule condition {kind!r}")
+
+def _getter(source):
+    kind = source[0]
+    if kind == "attr":
+        names, empty = source[1], source[2]
+        if len(names) == 1:
+            (name,) = names
+            return lambda attrs, text, waited: attrs.get(name) or empty
+
+        def first_attr(attrs, text, waited):
+            for name in names:
+                value = attrs.get(name)
+                if value:
+                    return value
+            return empty
+        return first_attr
+    if kind == "attr_as_is":
+        name, missing = source[1], source[2]
+        return lambda attrs, text, waited: attrs.get(name, missing)
+    if kind == "text":
+        empty = source[1]
+        return lambda attrs, text, waited: text or empty
+    if kind == "next_text":
+        return lambda attrs, text, waited: waited
+    raise ValueError(f"Unknown field source {kind!r}")
+
+class CompiledTag:
+    def __init__(self, tag, rules):
+        self.tag = tag
+        self.rules = [CompiledRule(rule) for rule in (rules if isinstance(rules, list) else [rules])]
+        # Rules that need the subtree text are all rendered at the end tag
+        self.collects = any(rule.uses_text for rule in self.rules)
+        # Attributes other rules match against this tag's text (label "for"), set by compile_rules
+        self.linked_by = []
+        if self.collects and any(rule.waits_for for rule in self.rules):
+            raise ValueError(f"<{tag}>: a rule cannot use both the element text and next_text")
+
+        # Most tags have a single unconditional rule and skip the choice
+        self.only = self.rules[0] if len(self.rules) == 1 and self.rules[0].when is None else None
+        self.choices = [(None if rule.when is None else _condition(rule.when), rule) for rule in self.rules]
+
+    def select(self, attrs):
+        for condition, rule in self.choices:
+            if condition is None or condition(attrs):
+                return rule
+        return None
+
+def compile_rules(rules):
+    dispatch = {tag: CompiledTag(tag, tag_rules) for tag, tag_rules in rules.items()}
+    for compiled in dispatch.values():
+        for rule in compiled.rules:
+            if rule.waits_for and not (rule.waits_for in dispatch and dispatch[rule.waits_for].collects):
+                raise ValueError(f"next_text({rule.waits_for!r}) needs a text rule for <{rule.waits_for}>")
+            if rule.match and rule.match not in dispatch[rule.waits_for].linked_by:
+                dispatch[rule.waits_for].linked_by.append(rule.match)
+    return dispatch
+
+DISPATCH = compile_rules(EXTRACTION_RULES)
+
+TARGET_TAGS = set(EXTRACTION_RULES)
+
+# Tags whose output contains the text of the whole subtree.
+TEXT_TAGS = {tag for tag, compiled in DISPATCH.items() if compiled.collects}
+
+# BeautifulSoup stores strings inside these tags as Script/Stylesheet/TemplateString/...
+# and get_text() skips them, so the streaming extractor must skip them too.
+STRING_CONTAINER_TAGS = {"script", "style", "template", "rt", "rp"}
+
+_WHITESPACE = re.compile(r"\s+")
+
+def _entries(dispatch):
+    # One lookup per start tag: the compiled rules and whether get_text() skips the tag's strings
+    tags = set(dispatch) | STRING_CONTAINER_TAGS
+    return {tag: (dispatch.get(tag), tag in STRING_CONTAINER_TAGS) for tag in tags}
+
+_ENTRIES = _entries(DISPATCH)
+
+def clean_text(text: str) -> str:
+    text = _WHITESPACE.sub(" ", text)
+    return text.strip()
+
+class _BudgetReached(Exception):
+    pass
+
+class _LinkedWaiter:
+    # A line waiting for the <tag match=id> text; the next <tag>'s text is kept as the fallback
+    __slots__ = ("slot", "rule", "attrs", "fallback", "done")
+
+    def __init__(self, slot, rule, attrs):
+        self.slot = slot
+        self.rule = rule
+        self.attrs = attrs
+        self.fallback = None
+        self.done = False
+
+class _StreamingTarget:
+    # lxml parser target: receives start/end/data events in document order and
+    # fills one output slot per DISPATCH element without building a tree.
+    # With a budget, parsing stops once the finished prefix of lines measures at
+    # least budget units (characters, or tokens via tokenization.token_counter).
+
+    def __init__(self, budget=None, measure=None, dispatch=None):
+        self.budget = budget
+        self.measure = measure or len
+        self.entries = _ENTRIES if dispatch is None else _entries(dispatch)
+        self.ready = 0
+        self.used = 0
+        self.stopped = False
+        self.lines = []
+        self.stack = []
+        self.chunks = []
+        self.collectors = 0
+        self.container_depth = 0
+        # Lines waiting for the text of the next <tag> (checkboxes and their label), by tag.
+        # Each line is registered once, so resolving all of them stays linear in the page size.
+        self.waiting = {}
+        # With next_text(match=...): (tag, attribute, value) -> text of the first such element,
+        # or the waiters to fill when it closes; claims hold waiters whose element has not started
+        self.linked = {}
+        self.claims = {}
+        self.deferred = []
+
+    def start(self, tag, attrs, nsmap=None):
+        # libxml2's HTML parser reports tag names in lowercase already
+        entry = self.entries.get(tag)
+        if entry is None:
+            # Most elements (div, span, ...) only need a stack entry
+            self.stack.append(None)
+            return
+
+        compiled, container = entry
+        if container:
+            self.container_depth += 1
+        collector = None
+        if compiled is not None:
+            collector = self.handle_start(compiled, attrs)
+        self.stack.append((container, collector))
+
+    def end(self, tag):
+        entry = self.stack.pop()
+        if entry is None:
+            return
+        container, collector = entry
+        if container:
+            self.container_depth -= 1
+        if collector is not None:
+            self.handle_end(collector)
+
+    def data(self, content):
+        if self.collectors and not self.container_depth:
+            self.chunks.append(content)
+
+    def close(self):
+        # lxml also calls close() after a callback raised _BudgetReached
+        if self.stopped:
+            return self.prefix()
+        for waiters in self.waiting.values():
+            for waiter in waiters:
+                if waiter.__class__ is not _LinkedWaiter:
+                    slot, rule, attrs = waiter
+                    self.lines[slot] = rule.render(attrs, waited=rule.waiting_missing)
+        for waiter in self.deferred:
+            if not waiter.done:
+                waited = waiter.rule.waiting_missing if waiter.fallback is None else waiter.fallback
+                self.lines[waiter.slot] = waiter.rule.render(waiter.attrs, waited=waited)
+        self.waiting = {}
+        self.deferred = []
+        return "\n".join(self.lines)
+
+    def fill(self, slot, line):
+        self.lines[slot] = line
+        self.advance()
+
+    def advance(self):
+        if self.budget is None:
+            return
+        while self.ready < len(self.lines) and self.lines[self.ready] is not None:
+            self.used += self.measure(self.lines[self.ready])
+            self.ready += 1
+            if self.used >= self.budget:
+                self.stopped = True
+                raise _BudgetReached()
+
+    def prefix(self):
+        return "\n".join(self.lines[:self.ready])
+
+    def handle_start(self, compiled, attrs):
+        rule = compiled.only or compiled.select(attrs)
+        if rule is None:
+            return None
+
+        lines = self.lines
+        # Text rules are completed when the element closes; they also take over the lines
+        # that wait for this tag's text
+        if compiled.collects:
+            waiters = self.waiting.pop(compiled.tag, None) if self.waiting else None
+            links = self.link(compiled, attrs) if compiled.linked_by else None
+            lines.append(None)
+            self.collectors += 1
+            return (len(lines) - 1, len(self.chunks), attrs, waiters, rule, links)
+
+        if rule.waits_for:
+            lines.append(None)
+            if rule.match and attrs.get("id"):
+                self.wait_linked(len(lines) - 1, rule, attrs)
+            else:
+                self.waiting.setdefault(rule.waits_for, []).append((len(lines) - 1, rule, attrs))
+        else:
+            lines.append(rule.render(attrs))
+            if self.budget is not None:
+                self.advance()
+        return None
+
+    def handle_end(self, collector):
+        slot, start, attrs, waiters, rule, links = collector
+        text = clean_text("".join(self.chunks[start:]))
+        self.collectors -= 1
+        if not self.collectors:
+            self.chunks.clear()
+
+        for key, linked in links or ():
+            self.linked[key] = text
+            for waiter in linked:
+                self.resolve(waiter, text)
+        for waiter in waiters or ():
+            if waiter.__class__ is _LinkedWaiter:
+                if waiter.fallback is None:
+                    waiter.fallback = text
+            else:
+                waiting_slot, waiting_rule, waiting_attrs = waiter
+                self.lines[waiting_slot] = waiting_rule.render(waiting_attrs, waited=text)
+        self.fill(slot, rule.render(attrs, text))
+
+    def link(self, compiled, attrs):
+        # Only the first element with a given value counts, like a lookup by id
+        links = []
+        for name in compiled.linked_by:
+            value = attrs.get(name)
+            if value:
+                key = (compiled.tag, name, value)
+                if key not in self.linked:
+                    linked = self.claims.pop(key, [])
+                    self.linked[key] = linked
+                    links.append((key, linked))
+        return links
+
+    def wait_linked(self, slot, rule, attrs):
+        key = (rule.waits_for, rule.match, attrs["id"])
+        state = self.linked.get(key)
+        if isinstance(state, str):
+            self.fill(slot, rule.render(attrs, waited=state))
+            return
+
+        waiter = _LinkedWaiter(slot, rule, attrs)
+        if state is None:
+            self.claims.setdefault(key, []).append(waiter)
+        else:
+            # Inside the matching element, which has not closed yet
+            state.append(waiter)
+        self.waiting.setdefault(rule.waits_for, []).append(waiter)
+        self.deferred.append(waiter)
+
+    def resolve(self, waiter, text):
+        if not waiter.done:
+            waiter.done = True
+            self.lines[waiter.slot] = waiter.rule.render(waiter.attrs, waited=text)
+
+def _parse(markup, budget, measure):
+    target = _StreamingTarget(budget, measure)
+    parser = etree.HTMLParser(target=target, strip_cdata=False, recover=True)
+    try:
+        parser.feed(markup)
+        return parser.close()
+    except _BudgetReached:
+        return target.prefix()
+
+class BudgetProbe:
+    # Incremental version of the budgeted extraction, fed with decoded chunks while a page
+    # downloads; feed() returns True once the model would not see any further markup.
+
+    def __init__(self, budget, measure=None):
+        self.target = _StreamingTarget(budget, measure)
+        self.parser = etree.HTMLParser(target=self.target, strip_cdata=False, recover=True)
+        self.started = False
+        self.done = False
+        self.failed = False
+
+    def feed(self, text):
+        if self.done or self.failed or not text:
+            return self.done
+        if not self.started:
+            self.started = True
+            if text[0] == "\N{BYTE ORDER MARK}":
+                text = text[1:]
+        try:
+            self.parser.feed(text)
+        except _BudgetReached:
+            self.done = True
+        except Exception:
+            # Leave the decision to the size cap; the page is still extracted normally
+            self.failed = True
+        return self.done
+
+def generate_text_representation(html_content, budget=None, measure=None):
+    # Single pass over lxml parser events, same output as generate_text_representation_soup.
+    # With a budget the result is the longest prefix of whole lines needed to reach it,
+    # identical to the start of the full output.
+    if not html_content:
+        return ""
+    if isinstance(html_content, str) and html_content[0] == "\N{BYTE ORDER MARK}":
+        html_content = html_content[1:]
+
+    try:
+        return _parse(html_content, budget, measure)
+    except (UnicodeDecodeError, LookupError, etree.ParserError):
+        if not isinstance(html_content, str):
+            raise
+        return _parse(html_content.encode("utf8"), budget, measure)
+
+def generate_text_representation_soup(html_content):
+    # Reference implementation: builds a full BeautifulSoup tree and recurses through it.
+    from bs4 import BeautifulSoup, NavigableString, Tag
+
+    soup = BeautifulSoup(html_content, "lxml")
+
+    for script in soup(["style"]):
+        script.decompose()
+
+    parsed = []
+
+    # Checkbox labels from one pass over the document instead of a find_next('label') scan
+    # per checkbox: the next <label> after each input, and the first <label> for each id
+    next_label = {}
+    label_for = {}
+    following = None
+    for element in reversed(soup.find_all(["input", "label"])):
+        if element.name == "label":
+            following = element
+            if config.EXTRACTION_LABEL_FOR_ID and element.get("for"):
+                label_for[element["for"]] = element
+        else:
+            next_label[id(element)] = following
+
+    def traverse(node):
+        if isinstance(node, NavigableString):
+            return
+
+        if isinstance(node, Tag):
+            tag = node.name.lower()
+
+            if tag in TARGET_TAGS:
+
+                # A
+                if tag == "a":
+                    text = clean_text(node.get_text())
+                    href = node.get("href", "No URL provided")
+                    parsed.append(f'LINK: {{ text: "{text or "<EMPTY>"}", href: "{href}" }}')
+
+                # FORM
+                elif tag == "form":
+                    action = node.get("action")
+                    method = node.get("method")
+                    parsed.append(f'FORM: {{ action: "{action or ""}", method: "{method or ""}" }}')
+
+                elif tag == "label":
+                    for_value = node.get("for")
+                    text = clean_text(node.get_text())
+                    parsed.append(f'LABEL: {{ for: "{for_value or ""}", "text": "{text or "<EMPTY>"}" }}')
+
+                # INPUT / CHECKBOX
+                elif tag == "input":
+                    input_type = node.get("type")
+                    name = node.get("name")
+                    placeholder = node.get("placeholder")
+
+                    if input_type == "checkbox":
+                        label_element = label_for.get(node.get("id")) or next_label[id(node)]
+                        label_text = clean_text(label_element.get_text()) if label_element else "<EMPTY>"
+                        parsed.append(f'CHECKBOX: {{ label: "{label_text}", input: {{ type: "checkbox", name: "{name or ""}", placeholder: "{placeholder or ""}" }} }}')
+                    else:
+                        parsed.append(f'INPUT: {{ type: "{input_type or ""}", name: "{name or ""}", placeholder: "{placeholder or ""}" }}')
+
+                # BUTTON
+                elif tag == "button":
+                    text = clean_text(node.get_text())
+                    parsed.append(f'BUTTON: {{ text: "{text or "<EMPTY>"}" }}')
+
+                # IFRAME
+                elif tag == "iframe":
+                    src = node.get("src")
+                    parsed.append(f'IFRAME: {{ src: "{src or ""} }}')
+
+                # SCRIPT
+                elif tag == "script":
+                    src = node.get("src")
+                    if src:
+                        parsed.append(f'SCRIPT: {{ src: "{src}" }}')
+                    else:
+                        parsed.append(f'SCRIPT: {{ <SCRIPT INLINE> }}')
+
+                # META
+                elif tag == "meta":
+                    name = node.get("name") or node.get("property")
+                    content = node.get("content")
+                    parsed.append(f'META: {{ name: "{name or ""}", content: "{content or "<EMPTY>"}" }}')
+
+                # IMG
+                elif tag == "img":
+                    src = node.get("src")
+                    alt = node.get("alt")
+                    parsed.append(f'IMG: {{ src: "{src or ""}", alt: "{alt or "<EMPTY>"}" }}')
+
+                # TEXT TAGS
+                elif tag in {"p", "ul", "ol", "li", "header", "noscript", "title"}:
+                    text = clean_text(node.get_text())
+                    parsed.append(f'{tag.upper()}: {{ text: "{text or "<EMPTY>"}" }}')
+
+            for child in node.children:
+                traverse(child)
+
+    traverse(soup)
+    return "\n".join(parsed)
@@ -0,0 +1,144 @@
+import time
+import codecs
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+class FetchResult:
+    def __init__(self, url):
+        self.url = url
+        self.html = None
+        self.status = None
+        self.content_type = ""
+        self.bytes_read = 0
+        self.ttfb_ms = None
+        self.elapsed_ms = None
+        self.truncated = False
+        self.truncated_reason = None
+        self.error = None
+
+    def metrics(self):
+        return {
+            "status": self.status,
+            "content_type": self.content_type,
+            "bytes_read": self.bytes_read,
+            "ttfb_ms": self.ttfb_ms,
+            "elapsed_ms": self.elapsed_ms,
+            "truncated": self.truncated,
+            "truncated_reason": self.truncated_reason,
+            "error": self.error,
+        }
+
+def is_html(content_type):
+    # A missing Content-Type is accepted, servers often omit it for pages
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type == "" or media_type in HTML_CONTENT_TYPES
+
+def charset(content_type):
+    # The charset parameter of Content-Type, UTF-8 without one (requests would assume
+    # ISO-8859-1 for text/*, httpx UTF-8; both fetches decode the same way instead)
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip(" \"'"):
+            return value.strip(" \"'")
+    return "utf-8"
+
+def incremental_decoder(encoding):
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+class _BodyReader:
+    # Shared by the sync and async fetch: decodes chunks as they arrive, stops at
+    # max_bytes or when the probe (extractor.BudgetProbe) has seen enough markup.
+
+    def __init__(self, result, max_bytes, probe):
+        self.result = result
+        self.decoder = incremental_decoder(charset(result.content_type))
+        self.max_bytes = max_bytes
+        self.probe = probe
+        self.parts = []
+
+    def add(self, chunk):
+        remaining = self.max_bytes - self.result.bytes_read
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            self.result.truncated = True
+            self.result.truncated_reason = "size_cap"
+
+        self.result.bytes_read += len(chunk)
+        text = self.decoder.decode(chunk)
+        self.parts.append(text)
+
+        if self.probe is not None and self.probe.feed(text):
+            self.result.truncated = True
+            self.result.truncated_reason = "token_budget"
+        return not self.result.truncated
+
+    def finish(self):
+        self.parts.append(self.decoder.decode(b"", final=True))
+        self.result.html = "".join(self.parts)
+
+def fetch_page(url, max_bytes, probe=None, timeout=10, chunk_size=16384, session=None):
+    import requests
+
+    result = FetchResult(url)
+    start = time.perf_counter()
+    try:
+        with (session or requests).get(url, timeout=timeout, stream=True) as response:
+            result.ttfb_ms = (time.perf_counter() - start) * 1000
+            result.status = response.status_code
+            result.content_type = response.headers.get("Content-Type", "")
+            response.raise_for_status()  # 4xx/5xx errors
+
+            if not is_html(result.content_type):
+                result.error = f"Unsupported content type: {result.content_type}"
+                return result
+
+            reader = _BodyReader(result, max_bytes, probe)
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk and not reader.add(chunk):
+                    break
+            reader.finish()
+    except requests.RequestException as e:
+        result.error = str(e)
+    finally:
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+    return result
+
+async def fetch_page_async(client, url, max_bytes, probe=None, chunk_size=16384, executor=None):
+    import asyncio
+    import httpx
+
+    result = FetchResult(url)
+    start = time.perf_counter()
+    try:
+        async with client.stream("GET", url) as response:
+            result.ttfb_ms = (time.perf_counter() - start) * 1000
+            result.status = response.status_code
+            result.content_type = response.headers.get("Content-Type", "")
+            response.raise_for_status()  # 4xx/5xx errors
+
+            if not is_html(result.content_type):
+                result.error = f"Unsupported content type: {result.content_type}"
+                return result
+
+            # The probe parses each chunk with lxml, which would stall the event loop on large
+            # pages; with a probe the chunks are fed through the executor instead
+            reader = _BodyReader(result, max_bytes, probe)
+            loop = asyncio.get_running_loop()
+            async for chunk in response.aiter_bytes(chunk_size):
+                if not chunk:
+                    continue
+                if probe is None:
+                    keep_reading = reader.add(chunk)
+                else:
+                    keep_reading = await loop.run_in_executor(executor, reader.add, chunk)
+                if not keep_reading:
+                    break
+            reader.finish()
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
+        result.error = str(e)
+    finally:
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+    return result
@@ -0,0 +1,111 @@
+import os
+import numpy as np
+
+# torch and transformers are imported when a torch backend is created, so the service
+# can start (and the ONNX backends can run) without paying for them up front
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+ONNX_DIRNAME = "model_onnx"
+ONNX_FILENAME = "model.onnx"
+ONNX_INT8_FILENAME = "model_int8.onnx"
+
+def default_onnx_dir(model_path):
+    # Exported artifacts live next to the saved model folder: src/model -> src/model_onnx
+    return os.path.join(os.path.dirname(os.path.normpath(model_path)), ONNX_DIRNAME)
+
+class TorchBackend:
+    tensor_type = 'pt'
+
+    def __init__(self, model_path, quantize=False, device="cpu"):
+        import torch
+        from transformers import MobileBertForSequenceClassification
+
+        model = MobileBertForSequenceClassification.from_pretrained(model_path)
+        model.eval()
+        if quantize:
+            # Dynamic int8: Linear weights are quantized once, activations per batch (CPU only)
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            device = "cpu"
+        self.device = torch.device(device)
+        self.model = model.to(self.device)
+        self.name = "torch-int8" if quantize else "torch"
+
+    def logits(self, inputs):
+        import torch
+
+        with torch.no_grad():
+            inputs = {key: value.to(self.device) for key, value in inputs.items()}
+            return self.model(**inputs).logits.cpu().numpy()
+
+class OnnxBackend:
+    tensor_type = 'np'
+
+    def __init__(self, onnx_path, name="onnx", num_threads=0):
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(f"{onnx_path} not found, run export_model.py first")
+
+        self.onnx_path = onnx_path
+        self.name = name
+        self.reopen(num_threads)
+
+    def reopen(self, num_threads=0):
+        # Also used by pre-forked workers: the session's thread pool does not survive fork()
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(self.onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {session_input.name for session_input in self.session.get_inputs()}
+
+    def logits(self, inputs):
+        feed = {key: np.asarray(value, dtype=np.int64) for key, value in inputs.items() if key in self.input_names}
+        return self.session.run(["logits"], feed)[0]
+
+def default_device():
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def load_backend(name, model_path, onnx_dir=None, device="cpu"):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {name!r}, expected one of {', '.join(BACKENDS)}")
+
+    if name == "torch":
+        return TorchBackend(model_path, device=device)
+    if name == "torch-int8":
+        return TorchBackend(model_path, quantize=True)
+
+    onnx_dir = onnx_dir or default_onnx_dir(model_path)
+    filename = ONNX_INT8_FILENAME if name == "onnx-int8" else ONNX_FILENAME
+    return OnnxBackend(os.path.join(onnx_dir, filename), name=name)
+
+def softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+POOLINGS = ("max", "mean", "attention")
+
+def pool_windows(logits, sample_index, samples, pooling="max"):
+    # One probability row per sample from the logits of its windows (rows of one sample are adjacent).
+    # max: the most phishing-like window decides; mean: average of the windows;
+    # attention: average weighted by softmax over each window's margin between its top two logits.
+    if pooling not in POOLINGS:
+        raise ValueError(f"Unknown window pooling {pooling!r}, expected one of {POOLINGS}")
+    probabilities = softmax(logits)
+    sample_index = np.asarray(sample_index)
+    pooled = np.zeros((samples, probabilities.shape[1]), dtype=probabilities.dtype)
+    starts = np.searchsorted(sample_index, np.arange(samples + 1))
+    for sample in range(samples):
+        window_logits = logits[starts[sample]:starts[sample + 1]]
+        windows = probabilities[starts[sample]:starts[sample + 1]]
+        if pooling == "max":
+            pooled[sample] = windows[np.argmax(windows[:, 1])]
+        elif pooling == "mean":
+            pooled[sample] = windows.mean(axis=0)
+        else:
+            top_two = np.sort(window_logits, axis=-1)[:, -2:]
+            weights = softmax(top_two[:, 1] - top_two[:, 0])
+            pooled[sample] = weights @ windows
+    return pooled
@@ -0,0 +1,149 @@
+import os
+import time
+import asyncio
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import httpx
+from scheduler import percentile
+
+DEFAULT_PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "example_parsing_html")
+
+def load_pages(folder):
+    pages = []
+    for name in sorted(os.listdir(folder)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(folder, name), "r", encoding="utf-8", errors="ignore") as f:
+                pages.append(f.read().encode("utf-8"))
+    if not pages:
+        raise SystemExit(f"No .html pages in {folder}")
+    return pages
+
+def start_stand_in_server(pages, delay, port):
+    # Stand-in for the real phishing/benign hosts: serves saved pages after an artificial delay
+    class PageHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            page_delay = float(query.get("delay", [delay])[0])
+            try:
+                index = int(parts.path.rstrip("/").rsplit("/", 1)[-1])
+            except ValueError:
+                index = 0
+            time.sleep(page_delay)
+
+            body = pages[index % len(pages)]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), PageHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def run_level(service_url, page_base, concurrency, total, run_id):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(timeout=120, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def one(i):
+            nonlocal errors
+            # A unique URL per request so the verdict cache cannot answer it
+            page_url = f"{page_base}/page/{i}?run={run_id}-{i}"
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(f"{service_url}/check_url", json={"url": page_url})
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput": total / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+async def run_bulk(service_url, page_base, bulk, total, run_id):
+    # The same number of URLs sent to /check_urls, `bulk` per request, one request at a time;
+    # requests/s counts URLs so the rows compare with /check_url
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(timeout=600) as client:
+        start = time.perf_counter()
+        for first in range(0, total, bulk):
+            urls = [f"{page_base}/page/{i}?run={run_id}-{i}" for i in range(first, min(first + bulk, total))]
+            call_start = time.perf_counter()
+            try:
+                response = await client.post(f"{service_url}/check_urls", json={"urls": urls})
+                if response.status_code != 200:
+                    errors += len(urls)
+                else:
+                    errors += sum(result["result"] is None for result in response.json()["results"])
+            except httpx.HTTPError:
+                errors += len(urls)
+            latencies.append(time.perf_counter() - call_start)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": f"bulk {bulk}",
+        "requests": total,
+        "errors": errors,
+        "throughput": total / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+async def main_async(args):
+    pages = load_pages(args.pages)
+    server = start_stand_in_server(pages, args.delay, args.stand_in_port)
+    page_base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Stand-in pages at {page_base} ({len(pages)} pages, {args.delay * 1000:.0f} ms delay)")
+    print(f"Service under test: {args.server}")
+
+    results = []
+    for level in args.concurrency:
+        total = max(args.requests, level)
+        results.append(await run_level(args.server, page_base, level, total, f"{int(time.time())}-{level}"))
+    for bulk in args.bulk:
+        total = max(args.requests, bulk)
+        results.append(await run_bulk(args.server, page_base, bulk, total, f"{int(time.time())}-bulk{bulk}"))
+
+    print(f"{'concurrency':>12}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for result in results:
+        print(f"{result['concurrency']:>12}{result['requests']:>10}{result['errors']:>8}"
+              f"{result['throughput']:>10.2f}{result['p50_ms']:>10.0f}{result['p99_ms']:>10.0f}")
+    server.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test /check_url against a local stand-in server that serves saved pages slowly.')
+    parser.add_argument('--server', default='http://127.0.0.1:5024', help='Running app.py or asgi_app.py.')
+    parser.add_argument('--pages', default=DEFAULT_PAGES, help='Folder of saved .html pages.')
+    parser.add_argument('--delay', type=float, default=0.5, help='Seconds the stand-in server waits before answering.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--requests', type=int, default=32, help='Requests per concurrency level.')
+    parser.add_argument('--bulk', type=int, nargs='*', default=[], help='Also send the URLs to /check_urls in requests of this many.')
+    parser.add_argument('--stand-in-port', type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
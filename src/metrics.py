@@ -0,0 +1,149 @@
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Prometheus text exposition without the client library: counters, histograms and gauges read at
+# scrape time. Every process has its own values (one per pre-fork worker).
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+BULK_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_registry = []
+_lock = threading.Lock()
+# Stage timings of the request being handled, for the optional per-request log line
+_request = contextvars.ContextVar("antiphishing_request", default=None)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with _lock:
+            values = sorted(self.values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with _lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            values = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self.values.items())
+        for key, (counts, total, count) in values:
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts + [count]):
+                labels = _format_labels(self.labels, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+class Gauge:
+    # callback() returns [(label values, value), ...], read at every scrape
+    def __init__(self, name, documentation, callback, labels=(), kind="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labels = tuple(labels)
+        self.kind = kind
+        _registry.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in self.callback():
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_SECONDS = Histogram(
+    "antiphishing_stage_seconds",
+    "Time spent in each stage of /check_url (url_model, fetch, decode, extract, queue, tokenize, model, inference, total; bulk_total for /check_urls).",
+    labels=("stage", "backend"))
+BATCH_SIZE = Histogram("antiphishing_batch_size", "Texts per model forward pass.", labels=("backend",), buckets=BATCH_BUCKETS)
+REQUESTS = Counter("antiphishing_requests_total", "Finished /check_url requests by outcome and by what answered them (model, cache, reputation, url_model).",
+                   labels=("outcome", "source", "backend"))
+ERRORS = Counter("antiphishing_errors_total", "Errors by stage.", labels=("stage",))
+BULK_ITEMS = Histogram("antiphishing_bulk_items", "URLs per /check_urls request.", buckets=BULK_BUCKETS)
+URL_MODEL_DECISIONS = Counter("antiphishing_url_model_decisions_total",
+                              "URL-only first stage decisions: benign, phishing or escalated to MobileBERT.",
+                              labels=("decision",))
+
+@contextmanager
+def stage(name, backend=""):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, backend)
+
+def observe(name, seconds, backend=""):
+    STAGE_SECONDS.observe(seconds, stage=name, backend=backend)
+    timings = _request.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+def start_request():
+    # Stages timed from here on (in this thread or a copied context) are added to this request
+    timings = {}
+    _request.set(timings)
+    return timings
+
+def log_request(timings, **fields):
+    # One JSON line per request, in milliseconds
+    record = {"ts": round(time.time(), 3), **fields}
+    record.update({f"{name}_ms": round(seconds * 1000.0, 3) for name, seconds in timings.items()})
+    print(json.dumps(record), flush=True)
@@ -1,17 +1,9 @@
 import os
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
-from bs4 import BeautifulSoup, NavigableString, Tag
-import re
-
-TARGET_TAGS = {
-    "a", "form", "input", "button", "iframe", "script", "title", "meta",
-    "img", "label", "p", "header", "footer", "ul", "ol", "li", "noscript"
-}
-
-def clean_text(text: str) -> str:
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+import corpus
+from extractor import generate_text_representation
 
 def fetch_website_content(path):
     try:
@@ -27,114 +19,100 @@ def fetch_website_content(path):
         print(f"[ERROR] {path}: {e}")
         return None
 
-def generate_text_representation(html_content):
-    soup = BeautifulSoup(html_content, "lxml")
-
-    for script in soup(["style"]):
-        script.decompose()
-
-    parsed = []
-
-    def traverse(node):
-        if isinstance(node, NavigableString):
-            return
-
-        if isinstance(node, Tag):
-            tag = node.name.lower()
-
-            if tag in TARGET_TAGS:
-
-                # A
-                if tag == "a":
-                    text = clean_text(node.get_text())
-                    href = node.get("href", "No URL provided")
-                    parsed.append(f'LINK: {{ text: "{text or "<EMPTY>"}", href: "{href}" }}')
-
-                # FORM
-                elif tag == "form":
-                    action = node.get("action")
-                    method = node.get("method")
-                    parsed.append(f'FORM: {{ action: "{action or ""}", method: "{method or ""}" }}')
-                
-                elif tag == "label":
-                    for_value = node.get("for")
-                    text = clean_text(node.get_text())
-                    parsed.append(f'LABEL: {{ for: "{for_value or ""}", "text": "{text or "<EMPTY>"}" }}')
-
-                # INPUT / CHECKBOX
-                elif tag == "input":
-                    input_type = node.get("type")
-                    name = node.get("name")
-                    placeholder = node.get("placeholder")
-
-                    if input_type == "checkbox":
-                        label_element = node.find_next('label')
-                        label_text = clean_text(label_element.get_text()) if label_element else "<EMPTY>"
-                        parsed.append(f'CHECKBOX: {{ label: "{label_text}", input: {{ type: "checkbox", name: "{name or ""}", placeholder: "{placeholder or ""}" }} }}')
-                    else:
-                        parsed.append(f'INPUT: {{ type: "{input_type or ""}", name: "{name or ""}", placeholder: "{placeholder or ""}" }}')
-
-                # BUTTON
-                elif tag == "button":
-                    text = clean_text(node.get_text())
-                    parsed.append(f'BUTTON: {{ text: "{text or "<EMPTY>"}" }}')
-
-                # IFRAME
-                elif tag == "iframe":
-                    src = node.get("src")
-                    parsed.append(f'IFRAME: {{ src: "{src or ""} }}')
-
-                # SCRIPT
-                elif tag == "script":
-                    src = node.get("src")
-                    if src:
-                        parsed.append(f'SCRIPT: {{ src: "{src}" }}')
-                    else:
-                        parsed.append(f'SCRIPT: {{ <SCRIPT INLINE> }}')
-
-                # META
-                elif tag == "meta":
-                    name = node.get("name") or node.get("property")
-                    content = node.get("content")
-                    parsed.append(f'META: {{ name: "{name or ""}", content: "{content or "<EMPTY>"}" }}')
-                        
-                # IMG
-                elif tag == "img":
-                    src = node.get("src")
-                    alt = node.get("alt")
-                    parsed.append(f'IMG: {{ src: "{src or ""}", alt: "{alt or "<EMPTY>"}" }}')
-
-                # TEXT TAGS
-                elif tag in {"p", "ul", "ol", "li", "header", "noscript", "title"}:
-                    text = clean_text(node.get_text())
-                    parsed.append(f'{tag.upper()}: {{ text: "{text or "<EMPTY>"}" }}')
-
-            for child in node.children:
-                traverse(child)
-
-    traverse(soup)
-    return "\n".join(parsed)
-
 def save_output_to_file(filename, flattened_content, output_dir):
     os.makedirs(output_dir, exist_ok=True)
     output_filename = os.path.join(output_dir, filename + ".txt")
-    with open(output_filename, 'w', encoding="utf-8") as file:
+    # Write to a temporary file first so an interrupted run never leaves a partial output
+    # that a resumed run would take as up to date
+    temp_filename = output_filename + ".tmp"
+    with open(temp_filename, 'w', encoding="utf-8") as file:
         file.write(flattened_content)
+    os.replace(temp_filename, output_filename)
 
-def process_folder(folder_path, output_dir):
-    html_files = [f for f in os.listdir(folder_path) if f.endswith(".txt")]
-    for html_file in tqdm(html_files, desc="Processing HTML files"):
-        full_path = os.path.join(folder_path, html_file)
+def is_up_to_date(input_path, output_path):
+    return os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+
+def process_file(task):
+    # Runs in a worker process; errors are returned instead of raised so one bad file
+    # does not stop the whole pool. Without an output_dir the text is returned to the caller.
+    full_path, output_dir = task
+    html_file = os.path.basename(full_path)
+    try:
         html_content = fetch_website_content(full_path)
         if html_content is None:
-            continue
+            return html_file, "failed", "cannot read file", None
         flattened_content = generate_text_representation(html_content)
+        if output_dir is None:
+            return html_file, "processed", None, flattened_content
         base_name = os.path.splitext(html_file)[0]
         save_output_to_file(base_name, flattened_content, output_dir)
+        return html_file, "processed", None, None
+    except Exception as e:
+        return html_file, "failed", f"{type(e).__name__}: {e}", None
+
+def run_tasks(tasks, workers, chunksize):
+    # Results come back in task order whatever the number of workers
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(tqdm(executor.map(process_file, tasks, chunksize=chunksize),
+                             total=len(tasks), desc="Processing HTML files"))
+    return [process_file(task) for task in tqdm(tasks, desc="Processing HTML files")]
+
+def report(results, skipped):
+    failed = [(name, error) for name, status, error, _ in results if status == "failed"]
+    for name, error in failed:
+        print(f"[ERROR] {name}: {error}")
+
+    summary = {"processed": len(results) - len(failed), "skipped": skipped, "failed": len(failed)}
+    print(f"Processed {summary['processed']}, skipped {summary['skipped']} up to date, failed {summary['failed']}")
+    return summary
+
+def list_html_files(folder_path):
+    # Sorted so every run (and every worker count) handles the files in the same order
+    return sorted(f for f in os.listdir(folder_path) if f.endswith(".txt"))
+
+def process_folder(folder_path, output_dir, workers=1, chunksize=32, force=False):
+    tasks = []
+    skipped = 0
+    for html_file in list_html_files(folder_path):
+        full_path = os.path.join(folder_path, html_file)
+        output_path = os.path.join(output_dir, os.path.splitext(html_file)[0] + ".txt")
+        if not force and is_up_to_date(full_path, output_path):
+            skipped += 1
+            continue
+        tasks.append((full_path, output_dir))
+
+    os.makedirs(output_dir, exist_ok=True)
+    return report(run_tasks(tasks, workers, chunksize), skipped)
+
+def process_folder_to_shards(folder_path, corpus_dir, label, workers=1, chunksize=32,
+                             shard_rows=5000, format="parquet"):
+    # The shards of one label are always rewritten as a whole; phishing and benign shards
+    # can share the same corpus folder because the label is the file prefix
+    tasks = [(os.path.join(folder_path, html_file), None) for html_file in list_html_files(folder_path)]
+    results = run_tasks(tasks, workers, chunksize)
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    for old_shard in corpus.list_shards(corpus_dir):
+        if os.path.basename(old_shard).startswith(label + "-"):
+            os.remove(old_shard)
+
+    with corpus.ShardWriter(corpus_dir, shard_rows=shard_rows, format=format, prefix=label) as writer:
+        for (full_path, _), (html_file, status, _, text) in zip(tasks, results):
+            if status == "processed":
+                writer.add(os.path.splitext(html_file)[0] + ".txt", corpus.LABELS[label], full_path, text)
+    print(f"Wrote {writer.total_rows} rows to {len(writer.shards)} {format} shards in {corpus_dir}")
+    return report(results, 0)
 
 def main():
     parser = argparse.ArgumentParser(description='Process phishing or benign websites.')
     parser.add_argument('type', choices=['phishing', 'benign'], help='Specify the type of websites to process.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of worker processes.')
+    parser.add_argument('--chunksize', type=int, default=32, help='Files handed to a worker at a time.')
+    parser.add_argument('--force', action='store_true', help='Reprocess files whose output is already up to date.')
+    parser.add_argument('--corpus-dir', help='Write sharded Parquet/Arrow files here instead of one .txt file per page.')
+    parser.add_argument('--corpus-format', choices=sorted(corpus.FORMATS), default='parquet')
+    parser.add_argument('--shard-rows', type=int, default=5000, help='Rows per corpus shard.')
     args = parser.parse_args()
 
     if args.type == 'phishing':
@@ -145,7 +123,11 @@ def main():
         output_dir = 'D://PTIT/Datn/Code/anti-phishing/data_for_training/benign_samples'
     
     if os.path.exists(folder_path):
-        process_folder(folder_path, output_dir)
+        if args.corpus_dir:
+            process_folder_to_shards(folder_path, args.corpus_dir, args.type, workers=args.workers,
+                                     chunksize=args.chunksize, shard_rows=args.shard_rows, format=args.corpus_format)
+        else:
+            process_folder(folder_path, output_dir, workers=args.workers, chunksize=args.chunksize, force=args.force)
     else:
         print(f"The folder {folder_path} does not exist.")
 
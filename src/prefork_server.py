@@ -0,0 +1,131 @@
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import argparse
+import traceback
+import config
+
+def threads_per_worker(workers, requested=0):
+    # Split the cores between the workers instead of letting every worker use all of them
+    if requested > 0:
+        return requested
+    return max(1, (os.cpu_count() or 1) // workers)
+
+def create_listener(host, port, backlog=128):
+    # Bound once in the parent; every worker accepts on the same socket
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(backlog)
+    return listener
+
+def run_worker(listener, threads):
+    import torch
+    from werkzeug.serving import make_server
+    import service
+    from app import app
+
+    torch.set_num_threads(threads)
+    if hasattr(service.backend, "reopen"):
+        # ONNX Runtime sessions are not fork-safe, each worker opens its own
+        service.backend.reopen(threads)
+    # Warmed up here rather than in the parent, so no inference thread pool exists before fork()
+    service.warm_up_model()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    signal.signal(signal.SIGINT, lambda signum, frame: sys.exit(0))
+
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+    try:
+        server.serve_forever()
+    finally:
+        if service.cache is not None:
+            service.cache.save()
+
+def spawn_worker(index, listener, threads):
+    pid = os.fork()
+    if pid:
+        return pid
+
+    code = 0
+    try:
+        run_worker(listener, threads)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 0
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        # Never return into the parent's loop
+        os._exit(code)
+
+def serve(host, port, workers, threads):
+    import torch
+    torch.set_num_threads(threads)
+
+    # The model and tokenizer are loaded here, once. Workers are forked afterwards and share
+    # the weight pages copy-on-write; nothing writes to them during inference.
+    print(f"Loading model (backend {config.INFERENCE_BACKEND})...")
+    import app  # noqa: F401
+    import service
+    service.load_model(warm_up=False)
+
+    listener = create_listener(host, port)
+    print(f"Serving on http://{host}:{port} with {workers} workers x {threads} torch threads")
+
+    # Keep the garbage collector from touching (and so copying) the objects created so far
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for index in range(workers):
+        children[spawn_worker(index, listener, threads)] = index
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        print(f"Worker {index} (pid {pid}) exited with status {status}, restarting")
+        time.sleep(1)
+        children[spawn_worker(index, listener, threads)] = index
+
+    listener.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve app.py from several pre-forked worker processes sharing one loaded model.')
+    parser.add_argument('--host', default=config.SERVING_HOST)
+    parser.add_argument('--port', type=int, default=config.SERVING_PORT)
+    parser.add_argument('--workers', type=int, default=config.SERVING_WORKERS)
+    parser.add_argument('--threads', type=int, default=config.TORCH_THREADS_PER_WORKER, help='Torch threads per worker, 0 = cores / workers.')
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        print("The pre-fork server needs fork() (Linux); use app.py or asgi_app.py instead.")
+        return
+
+    workers = max(1, args.workers)
+    serve(args.host, args.port, workers, threads_per_worker(workers, args.threads))
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,26 @@
 import os
+import re
 import shutil
+from dedup import raw_hash
 
 SOURCE_DIR = "D://PTIT/Datn/phish_sample_30k"
 TARGET_DIR = "D://PTIT/Datn/Code/anti-phishing/dataset_for_training/phishing_websites"
 
 os.makedirs(TARGET_DIR, exist_ok=True)
 
+# Trang có nội dung HTML giống hệt một trang đã thu thập thì không chuyển nữa (để lại ở SOURCE_DIR);
+# các trang gần giống nhau được dedup.py gom nhóm. Đánh số tiếp sau file htmlN.txt lớn nhất đã có.
+seen = set()
 counter = 1
+for name in os.listdir(TARGET_DIR):
+    match = re.fullmatch(r"html([0-9]+)\.txt", name)
+    if match:
+        counter = max(counter, int(match.group(1)) + 1)
+        with open(os.path.join(TARGET_DIR, name), "rb") as f:
+            seen.add(raw_hash(f.read()))
+
+moved = 0
+duplicates = 0
 
 for folder_name in os.listdir(SOURCE_DIR):
     folder_path = os.path.join(SOURCE_DIR, folder_name)
@@ -17,11 +31,20 @@ for folder_name in os.listdir(SOURCE_DIR):
     html_path = os.path.join(folder_path, "html.txt")
 
     if os.path.isfile(html_path):
+        with open(html_path, "rb") as f:
+            digest = raw_hash(f.read())
+        if digest in seen:
+            duplicates += 1
+            continue
+        seen.add(digest)
+
         new_name = f"html{counter}.txt"
         target_path = os.path.join(TARGET_DIR, new_name)
 
         shutil.move(html_path, target_path)
 
         counter += 1
+        moved += 1
 
-print(f"\nTotal files moved: {counter - 1}")
+print(f"\nTotal files moved: {moved}")
+print(f"Duplicates skipped: {duplicates}")
@@ -0,0 +1,207 @@
+import os
+import re
+import time
+import bisect
+import argparse
+import threading
+from urllib.parse import urlsplit
+
+DEFAULT_WHITELIST_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    "ui_extension", "extension", "src", "whitelist.js")
+
+def registrable_domain(host):
+    # example.co.uk for www.example.co.uk, from the public suffix list bundled with tld.
+    # Private suffixes count, so user.blogspot.com is its own registrable domain.
+    from tld import get_fld
+    return get_fld(host, fix_protocol=True, fail_silently=True)
+
+def host_of(url):
+    try:
+        host = urlsplit(url if "//" in url else f"http://{url}").hostname
+    except ValueError:
+        return None
+    return host.rstrip(".").lower() if host else None
+
+def read_list(path):
+    # One domain per line, # starts a comment. "example.com" covers the host and its subdomains,
+    # "=example.com" the host only.
+    subtree, exact = set(), set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = line.split("#", 1)[0].strip().lower().rstrip(".")
+            if entry.startswith("="):
+                exact.add(entry[1:])
+            elif entry:
+                subtree.add(entry[2:] if entry.startswith("*.") else entry)
+    exact.discard("")
+    return subtree, exact
+
+class DomainList:
+    # Sorted, immutable tuples searched with bisect: a few bytes per entry above the strings
+    # themselves, and one tld lookup plus a handful of bisects per host.
+
+    def __init__(self, subtree=(), exact=()):
+        self.subtree = tuple(sorted(subtree))
+        self.exact = tuple(sorted(exact))
+
+    def __len__(self):
+        return len(self.subtree) + len(self.exact)
+
+    @staticmethod
+    def _contains(entries, value):
+        index = bisect.bisect_left(entries, value)
+        return index < len(entries) and entries[index] == value
+
+    def matches(self, host, domain):
+        if self._contains(self.exact, host):
+            return True
+        if not self.subtree:
+            return False
+        # The host and its parents, down to the registrable domain (never a bare suffix like co.uk)
+        labels = host.split(".")
+        stop = len(domain.split(".")) if domain else len(labels)
+        for start in range(len(labels) - stop + 1):
+            if self._contains(self.subtree, ".".join(labels[start:])):
+                return True
+        return False
+
+class ReputationFilter:
+    # Answers allow/block for known hosts before any fetch or inference. The list files are
+    # re-read when their modification time changes, checked at most every reload_interval seconds.
+
+    def __init__(self, allow_path=None, block_path=None, reload_interval=5.0):
+        self.allow_path = allow_path
+        self.block_path = block_path
+        self.reload_interval = reload_interval
+        self.allow = DomainList()
+        self.block = DomainList()
+        self._mtimes = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.allowed = 0
+        self.blocked = 0
+        self.reloads = 0
+        self.reload()
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns if path else None
+        except OSError:
+            return None
+
+    def reload(self):
+        mtimes = {path: self._mtime(path) for path in (self.allow_path, self.block_path) if path}
+        lists = {}
+        for name, path in (("allow", self.allow_path), ("block", self.block_path)):
+            if path and mtimes[path] is not None:
+                try:
+                    lists[name] = DomainList(*read_list(path))
+                except OSError as e:
+                    print(f"Error reading {name} list {path}: {e}")
+                    lists[name] = getattr(self, name)
+            else:
+                lists[name] = DomainList()
+        # Swapped in one assignment each; lookups running meanwhile see the old or the new list
+        self.allow, self.block = lists["allow"], lists["block"]
+        self._mtimes = mtimes
+        self.reloads += 1
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._checked < self.reload_interval:
+                return
+            self._checked = now
+            if any(self._mtime(path) != mtime for path, mtime in self._mtimes.items()):
+                self.reload()
+                print(f"Reputation lists reloaded: {len(self.allow)} allowed, {len(self.block)} blocked")
+
+    def lookup(self, url):
+        # 'allow', 'block' or None when the host is not listed (the model decides)
+        self.maybe_reload()
+        decision = None
+        host = host_of(url)
+        if host and (self.allow or self.block):
+            domain = registrable_domain(host)
+            if self.block.matches(host, domain):
+                decision = "block"
+            elif self.allow.matches(host, domain):
+                decision = "allow"
+
+        with self._lock:
+            self.lookups += 1
+            if decision == "allow":
+                self.allowed += 1
+            elif decision == "block":
+                self.blocked += 1
+        return decision
+
+    def stats(self):
+        with self._lock:
+            resolved = self.allowed + self.blocked
+            return {
+                "allow_entries": len(self.allow),
+                "block_entries": len(self.block),
+                "allow_path": self.allow_path,
+                "block_path": self.block_path,
+                "lookups": self.lookups,
+                "allowed": self.allowed,
+                "blocked": self.blocked,
+                "resolved_fraction": resolved / self.lookups if self.lookups else 0.0,
+                "reloads": self.reloads,
+            }
+
+def read_whitelist_js(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return re.findall(r"['\"]([^'\"]+)['\"]", f.read().split("[", 1)[1].split("]", 1)[0])
+
+def import_whitelist(args):
+    # The extension compares the exact hostname, so the entries are imported as exact hosts
+    domains = sorted({domain.strip().lower() for domain in read_whitelist_js(args.whitelist) if domain.strip()})
+    prefix = "" if args.subdomains else "="
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(f"# Imported from {os.path.basename(args.whitelist)}\n")
+        for domain in domains:
+            f.write(f"{prefix}{domain}\n")
+    print(f"Wrote {len(domains)} domains to {args.output}")
+
+def lookup(args):
+    reputation = ReputationFilter(args.allow, args.block)
+    for url in args.urls:
+        print(f"{url}: {reputation.lookup(url) or 'unknown'}")
+
+    if args.benchmark:
+        urls = args.urls * max(1, args.benchmark // len(args.urls))
+        start = time.perf_counter()
+        for url in urls:
+            reputation.lookup(url)
+        elapsed = time.perf_counter() - start
+        print(f"{len(reputation.allow)} allowed + {len(reputation.block)} blocked entries, "
+              f"{elapsed / len(urls) * 1e6:.1f} us per lookup")
+
+def main():
+    parser = argparse.ArgumentParser(description='Domain allow/block lists answered before the model.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    importer = commands.add_parser('import-whitelist', help="Convert the extension's whitelist.js into an allow list file.")
+    importer.add_argument('--whitelist', default=DEFAULT_WHITELIST_JS)
+    importer.add_argument('--output', default='allowlist.txt')
+    importer.add_argument('--subdomains', action='store_true', help='Also allow the subdomains of every entry.')
+
+    checker = commands.add_parser('lookup', help='Look up URLs or hosts.')
+    checker.add_argument('urls', nargs='+')
+    checker.add_argument('--allow')
+    checker.add_argument('--block')
+    checker.add_argument('--benchmark', type=int, default=0, help='Also time this many lookups.')
+
+    args = parser.parse_args()
+    if args.command == 'import-whitelist':
+        import_whitelist(args)
+    else:
+        lookup(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class BatchScheduler:
+    # Collects pending requests for up to max_wait_ms or max_batch_size items,
+    # runs predict_batch once on the whole batch and resolves each caller's future.
+
+    def __init__(self, predict_batch, max_batch_size=16, max_wait_ms=10.0, stats_window=2048, on_batch=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        # Called with the queue wait of every item of a batch before it runs (metrics)
+        self.on_batch = on_batch
+
+        self.stats_window = stats_window
+        self._start()
+        # Threads do not survive fork(): a pre-forked serving worker gets its own fresh scheduler
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=self.stats_window)
+        self._batch_sizes = deque(maxlen=self.stats_window)
+        self._total_requests = 0
+        self._total_batches = 0
+        self._total_errors = 0
+
+        self._thread = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def predict(self, item, timeout=None):
+        return self.submit(item).result(timeout=timeout)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _, _ in batch]
+            if self.on_batch is not None:
+                # A failing callback must not kill the worker: the futures would never resolve
+                started = time.perf_counter()
+                try:
+                    self.on_batch([started - submitted for _, _, submitted in batch])
+                except Exception as e:
+                    print(f"Error in batch callback: {type(e).__name__}: {e}")
+            try:
+                results = self.predict_batch(items)
+                error = None
+            except Exception as e:
+                results = None
+                error = e
+
+            done = time.perf_counter()
+            for index, (_, future, submitted) in enumerate(batch):
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[index])
+
+            with self._lock:
+                self._total_requests += len(batch)
+                self._total_batches += 1
+                if error is not None:
+                    self._total_errors += len(batch)
+                self._batch_sizes.append(len(batch))
+                self._latencies.extend(done - submitted for _, _, submitted in batch)
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            batch_sizes = list(self._batch_sizes)
+            total_requests = self._total_requests
+            total_batches = self._total_batches
+            total_errors = self._total_errors
+
+        mean_batch = sum(batch_sizes) / len(batch_sizes) if batch_sizes else 0.0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "requests": total_requests,
+            "batches": total_batches,
+            "errors": total_errors,
+            "queue_depth": self.queue_depth(),
+            "latency_p50_ms": percentile(latencies, 50) * 1000.0,
+            "latency_p99_ms": percentile(latencies, 99) * 1000.0,
+            "mean_batch_size": mean_batch,
+            "batch_fill": mean_batch / self.max_batch_size,
+            "full_batches": sum(1 for size in batch_sizes if size == self.max_batch_size),
+        }
@@ -0,0 +1,511 @@
+import time
+import base64
+import zlib
+import threading
+import config
+import fetcher
+import metrics
+from extractor import BudgetProbe, generate_text_representation
+from tokenization import encode_batch, encode_windows, window_budget
+from inference import softmax, pool_windows
+from cache import VerdictCache, make_key
+from reputation import ReputationFilter
+from scheduler import BatchScheduler
+
+# The trained model and tokenizer are loaded by load_model(), either right away or in the
+# background while the server already answers /health
+MODEL_PATH = config.MODEL_PATH
+backend = None
+tokenizer = None
+count_tokens = None
+
+WARMUP_HTML = "<html><head><title>Sign in</title></head><body><a href='#'>Forgot password?</a>" \
+              "<label for='r'>Remember me</label><input type='checkbox' id='r'><button>Login</button></body></html>"
+
+_ready = threading.Event()
+_load_lock = threading.Lock()
+_started_at = time.time()
+_load_state = {'status': 'warming', 'error': None, 'load_seconds': None, 'warmup_seconds': None}
+
+def load_model(warm_up=True):
+    global backend, tokenizer, count_tokens
+    with _load_lock:
+        if _ready.is_set():
+            return
+        if _load_state['status'] == 'failed':
+            raise RuntimeError(f"Model failed to load: {_load_state['error']}")
+        try:
+            start = time.perf_counter()
+            from tokenization import load_tokenizer, token_counter
+            from inference import load_backend
+            backend = load_backend(config.INFERENCE_BACKEND, MODEL_PATH, config.ONNX_MODEL_DIR)
+            tokenizer = load_tokenizer(MODEL_PATH)
+            count_tokens = token_counter(tokenizer)
+            _load_state['load_seconds'] = time.perf_counter() - start
+
+            if warm_up:
+                warm_up_model()
+        except Exception as e:
+            _load_state['status'] = 'failed'
+            _load_state['error'] = f"{type(e).__name__}: {e}"
+            print(f"Error loading model from {MODEL_PATH}: {_load_state['error']}")
+            raise
+
+        _load_state['status'] = 'ready'
+        _ready.set()
+
+def warm_up_model():
+    # The first forward pass allocates buffers and picks kernels; do it before reporting
+    # ready so the first real request does not pay for it
+    start = time.perf_counter()
+    predict_batch([extract_features(WARMUP_HTML)])
+    _load_state['warmup_seconds'] = time.perf_counter() - start
+
+def _load_in_background():
+    try:
+        load_model()
+    except Exception:
+        pass  # recorded in _load_state and reported by /health
+
+def start_background_load():
+    threading.Thread(target=_load_in_background, name="model-loader", daemon=True).start()
+
+def wait_ready(timeout=None):
+    if _load_state['status'] == 'failed':
+        return False
+    return _ready.wait(timeout)
+
+def health():
+    return {**_load_state, 'backend': config.INFERENCE_BACKEND, 'uptime_seconds': time.time() - _started_at}
+
+def start():
+    load_url_model()
+    if config.BACKGROUND_LOAD:
+        start_background_load()
+    else:
+        load_model()
+
+LABEL_MAP = {0: 'benign', 1: 'phishing'}
+BACKEND = config.INFERENCE_BACKEND
+
+cache = None
+if config.CACHE_ENABLED:
+    cache = VerdictCache(
+        max_entries=config.CACHE_MAX_ENTRIES,
+        ttl_seconds=config.CACHE_TTL_SECONDS,
+        persist_path=config.CACHE_FILE,
+        save_interval=config.CACHE_SAVE_INTERVAL
+    )
+
+# Tokens of extracted text the model sees: the first window, or all windows of a long page
+TOKEN_BUDGET = window_budget(max(1, config.SCORING_WINDOWS), config.WINDOW_STRIDE)
+
+reputation = None
+if config.REPUTATION_ALLOW_FILE or config.REPUTATION_BLOCK_FILE:
+    reputation = ReputationFilter(config.REPUTATION_ALLOW_FILE, config.REPUTATION_BLOCK_FILE,
+                                  config.REPUTATION_RELOAD_SECONDS)
+
+def reputation_verdict(url):
+    # Listed hosts are answered without fetching the page or running the model
+    if reputation is None:
+        return None
+    decision = reputation.lookup(url)
+    if decision is None:
+        return None
+    return {'result': 'benign' if decision == 'allow' else 'phishing', 'source': 'reputation'}
+
+url_model = None
+_url_model_lock = threading.Lock()
+
+def load_url_model():
+    global url_model
+    with _url_model_lock:
+        if url_model is None and config.URL_MODEL_PATH:
+            from url_model import UrlModel
+            url_model = UrlModel.load(config.URL_MODEL_PATH)
+            print(f"URL model loaded from {config.URL_MODEL_PATH}: phishing below {url_model.benign_below:.3f} is benign, "
+                  f"from {url_model.phishing_above:.3f} phishing")
+    return url_model
+
+def url_verdict(url):
+    # First stage of the cascade; None escalates the URL to the page fetch and MobileBERT
+    return url_verdicts([url])[0]
+
+def url_verdicts(urls):
+    if not config.URL_MODEL_PATH:
+        return [None] * len(urls)
+    model = url_model or load_url_model()
+    verdicts = [None] * len(urls)
+    indexes = [index for index, url in enumerate(urls) if isinstance(url, str) and url]
+    if not indexes:
+        return verdicts
+    with metrics.stage("url_model"):
+        decisions = model.decide_many([urls[index] for index in indexes])
+    for index, (label, probability) in zip(indexes, decisions):
+        metrics.URL_MODEL_DECISIONS.inc(decision='escalated' if label is None else LABEL_MAP[label])
+        if label is not None:
+            verdicts[index] = {'result': LABEL_MAP[label], 'probabilities': [1.0 - probability, probability],
+                               'source': 'url_model'}
+    return verdicts
+
+def fetch_probe():
+    # Stop downloading once the extracted features would fill the model input
+    if config.EXTRACTION_EARLY_STOP and count_tokens is not None:
+        return BudgetProbe(TOKEN_BUDGET, count_tokens)
+    return None
+
+def fetch_page(url):
+    with metrics.stage("fetch"):
+        result = fetcher.fetch_page(
+            url,
+            max_bytes=config.FETCH_MAX_BYTES,
+            probe=fetch_probe(),
+            timeout=config.FETCH_TIMEOUT
+        )
+    if result.error:
+        metrics.ERRORS.inc(stage="fetch")
+        print(f"Error fetching URL {url}: {result.error}")
+    return result
+
+def fetch_html(url):
+    return fetch_page(url).html
+
+def create_async_client():
+    import httpx
+
+    # One pooled client shared by every request in the async server
+    return httpx.AsyncClient(
+        timeout=config.FETCH_TIMEOUT,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=config.FETCH_MAX_CONNECTIONS,
+            max_keepalive_connections=config.FETCH_MAX_KEEPALIVE
+        )
+    )
+
+async def fetch_page_async(client, url, executor=None):
+    with metrics.stage("fetch"):
+        result = await fetcher.fetch_page_async(client, url, max_bytes=config.FETCH_MAX_BYTES, probe=fetch_probe(),
+                                                executor=executor)
+    if result.error:
+        metrics.ERRORS.inc(stage="fetch")
+        print(f"Error fetching URL {url}: {result.error}")
+    return result
+
+def html_from_request(data):
+    with metrics.stage("decode"):
+        return _html_from_request(data)
+
+def _html_from_request(data):
+    # Page HTML captured by the extension, plain ('html') or gzip + base64 ('html_gzip'),
+    # cut to MAX_PAGE_BYTES; None means the page has to be fetched by the server
+    try:
+        if data.get('html_gzip'):
+            compressed = base64.b64decode(data['html_gzip'], validate=True)
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            raw = decompressor.decompress(compressed, config.MAX_PAGE_BYTES)
+            return raw.decode('utf-8', errors='replace') or None
+    except (ValueError, zlib.error, TypeError) as e:
+        metrics.ERRORS.inc(stage="decode")
+        print(f"Error decoding page HTML for {data.get('url', '')}: {e}")
+        return None
+
+    html_content = data.get('html')
+    if isinstance(html_content, str) and html_content:
+        return html_content[:config.MAX_PAGE_BYTES]
+    return None
+
+def predict_batch(texts):
+    metrics.BATCH_SIZE.observe(len(texts), backend=BACKEND)
+    if config.SCORING_WINDOWS > 1:
+        # All windows of all texts go through the model together
+        with metrics.stage("tokenize", BACKEND):
+            inputs, sample_index = encode_windows(tokenizer, texts, config.SCORING_WINDOWS, config.WINDOW_STRIDE,
+                                                  return_tensors=backend.tensor_type)
+        with metrics.stage("model", BACKEND):
+            logits = backend.logits(inputs)
+        return pool_windows(logits, sample_index, len(texts), config.WINDOW_POOLING).tolist()
+
+    with metrics.stage("tokenize", BACKEND):
+        inputs = encode_batch(tokenizer, texts, return_tensors=backend.tensor_type)
+    with metrics.stage("model", BACKEND):
+        logits = backend.logits(inputs)
+    return softmax(logits).tolist()
+
+def observe_queue_waits(waits):
+    for wait in waits:
+        metrics.observe("queue", wait, BACKEND)
+
+scheduler = None
+if config.BATCHING_ENABLED:
+    scheduler = BatchScheduler(predict_batch, max_batch_size=config.MAX_BATCH_SIZE, max_wait_ms=config.MAX_WAIT_MS,
+                               on_batch=observe_queue_waits)
+
+def extract_features(html_content):
+    # The lxml parse and the extraction are one pass, timed together
+    with metrics.stage("extract"):
+        if config.EXTRACTION_EARLY_STOP:
+            return generate_text_representation(html_content, budget=TOKEN_BUDGET, measure=count_tokens)
+        return generate_text_representation(html_content)
+
+def score_phishing(html_content):
+    # Loads the model here if nothing has started it yet (scripts that import the service)
+    if not _ready.is_set():
+        load_model()
+    processed_text = extract_features(html_content)
+
+    # Queue wait, tokenization and forward pass as seen by this request
+    with metrics.stage("inference", BACKEND):
+        try:
+            if scheduler is not None:
+                return scheduler.predict(processed_text)
+            return predict_batch([processed_text])[0]
+        except Exception:
+            metrics.ERRORS.inc(stage="inference")
+            raise
+
+def top_class(probabilities):
+    return max(range(len(probabilities)), key=probabilities.__getitem__)
+
+def predict_phishing(html_content):
+    return top_class(score_phishing(html_content))
+
+def cached_verdict(url):
+    # Without content hashing a fresh verdict for the URL is enough to skip the download
+    if cache is not None and not config.CACHE_KEY_CONTENT:
+        return cache.get(make_key(url))
+    return None
+
+def verdict_key(url, html_content, from_client=False):
+    # Verdicts on HTML sent by the client are only keyed with its content hash: under the bare
+    # URL they would be served to every later URL-only request, whatever HTML the client made up
+    content_keyed = config.CACHE_KEY_CONTENT or from_client
+    return make_key(url, html_content if content_keyed else None), content_keyed
+
+def classify_html(url, html_content, from_client=False):
+    key, content_keyed = verdict_key(url, html_content, from_client)
+    verdict = cache.get(key) if cache is not None and content_keyed else None
+
+    if verdict is None:
+        probabilities = score_phishing(html_content)
+        verdict = {'result': LABEL_MAP[top_class(probabilities)], 'probabilities': probabilities}
+        if cache is not None:
+            cache.put(key, verdict)
+    return verdict
+
+def verdict_payload(verdict):
+    # The answer plus, when a model produced it, the class probabilities and their maximum as confidence
+    payload = {'result': verdict['result']}
+    probabilities = verdict.get('probabilities')
+    if probabilities is not None:
+        payload['confidence'] = max(probabilities)
+        payload['probabilities'] = {LABEL_MAP[index]: probability for index, probability in enumerate(probabilities)}
+    if verdict.get('source'):
+        payload['source'] = verdict['source']
+    return payload
+
+# /check_urls: many URLs or pages per call. Listed, cached and URL-model answers are taken first,
+# the remaining pages are fetched concurrently by the server and scored in shared batches.
+
+def bulk_items(data):
+    # {"urls": [...]} or {"items": [{"url": ..., "html" | "html_gzip": ...}, ...]}; (items, error)
+    if not isinstance(data, dict):
+        return None, 'Invalid JSON body'
+    entries = data.get('items')
+    if entries is None:
+        entries = data.get('urls')
+    if not isinstance(entries, list) or not entries:
+        return None, 'Expected a non-empty "urls" or "items" list'
+    if len(entries) > config.BULK_MAX_ITEMS:
+        return None, f'At most {config.BULK_MAX_ITEMS} items per request'
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, (str, dict)):
+            return None, f'Item {index} must be a URL string or an object with a "url"'
+
+    items = []
+    for entry in entries:
+        entry = entry if isinstance(entry, dict) else {'url': entry}
+        url = entry.get('url')
+        items.append({
+            'url': url if isinstance(url, str) else '',
+            'data': entry,
+            'html': None,
+            'from_client': False,
+            'verdict': None,
+            'fetch': None,
+            'error': None if isinstance(url, str) and url else 'Missing url',
+            'failed_stage': None if isinstance(url, str) and url else 'request',
+            'timings': {},
+        })
+    return items, None
+
+# Outcome recorded for an item that failed at the given stage
+BULK_FAILURE_OUTCOMES = {'fetch': 'fetch_error', 'not_ready': 'not_ready'}
+
+def bulk_failed(item, stage, error):
+    # stage: request, fetch, not_ready, extract or score
+    item['failed_stage'] = stage
+    item['error'] = error
+
+def bulk_invalid(item, error):
+    metrics.ERRORS.inc(stage="request")
+    print(f"Error checking URL {item['url']!r}: {type(error).__name__}: {error}")
+    bulk_failed(item, 'request', f"Invalid url: {type(error).__name__}: {error}")
+
+def elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000.0
+
+def _source(verdict, source):
+    return {**verdict, 'source': source} if verdict is not None else None
+
+def bulk_prefilter(items):
+    # Answers what needs no model and decodes the pages sent with the request; returns the
+    # items still to be scored. A URL that makes a lookup fail gets its own error, the others go on
+    open_items = [item for item in items if item['error'] is None]
+    for item in open_items:
+        try:
+            item['verdict'] = reputation_verdict(item['url']) or _source(cached_verdict(item['url']), 'cache')
+        except Exception as e:
+            bulk_invalid(item, e)
+    undecided = [item for item in open_items if item['error'] is None and item['verdict'] is None]
+    try:
+        verdicts = url_verdicts([item['url'] for item in undecided])
+    except Exception:
+        # Retried one URL at a time to find the ones that fail
+        verdicts = []
+        for item in undecided:
+            try:
+                verdicts.append(url_verdict(item['url']))
+            except Exception as e:
+                bulk_invalid(item, e)
+                verdicts.append(None)
+    for item, verdict in zip(undecided, verdicts):
+        item['verdict'] = verdict
+
+    pending = [item for item in undecided if item['error'] is None and item['verdict'] is None]
+    for item in pending:
+        if item['data'].get('html') or item['data'].get('html_gzip'):
+            start = time.perf_counter()
+            item['html'] = html_from_request(item['data'])
+            item['from_client'] = item['html'] is not None
+            item['timings']['decode_ms'] = elapsed_ms(start)
+    return pending
+
+def bulk_fetched(item, result):
+    item['fetch'] = result.metrics()
+    item['timings']['fetch_ms'] = result.elapsed_ms
+    item['html'] = result.html
+    if not result.html:
+        bulk_failed(item, 'fetch', result.error or 'Error fetching HTML content')
+
+def bulk_not_ready(items):
+    for item in items:
+        bulk_failed(item, 'not_ready', 'Model is not ready')
+
+def bulk_fetch(item):
+    bulk_fetched(item, fetch_page(item['url']))
+
+def bulk_score(items):
+    # Extraction per page, then the model over all pages in batches of BULK_BATCH_SIZE
+    # (the scheduler is bypassed, the batch is already formed)
+    scored = []
+    for item in items:
+        if item['error'] is not None or item['verdict'] is not None:
+            continue
+        key, content_keyed = verdict_key(item['url'], item['html'], item['from_client'])
+        verdict = cache.get(key) if cache is not None and content_keyed else None
+        if verdict is not None:
+            item['verdict'] = _source(verdict, 'cache')
+            continue
+        start = time.perf_counter()
+        try:
+            item['text'] = extract_features(item['html'])
+        except Exception as e:
+            metrics.ERRORS.inc(stage="extract")
+            bulk_failed(item, 'extract', f"Error extracting features: {type(e).__name__}: {e}")
+            continue
+        item['timings']['extract_ms'] = elapsed_ms(start)
+        item['key'] = key
+        scored.append(item)
+
+    for offset in range(0, len(scored), config.BULK_BATCH_SIZE):
+        batch = scored[offset:offset + config.BULK_BATCH_SIZE]
+        start = time.perf_counter()
+        try:
+            with metrics.stage("inference", BACKEND):
+                results = predict_batch([item['text'] for item in batch])
+        except Exception as e:
+            metrics.ERRORS.inc(stage="inference")
+            print(f"Error scoring a batch of {len(batch)} pages: {type(e).__name__}: {e}")
+            for item in batch:
+                bulk_failed(item, 'score', f"Inference failed: {type(e).__name__}")
+            continue
+        inference_ms = elapsed_ms(start)
+        for item, probabilities in zip(batch, results):
+            item['verdict'] = {'result': LABEL_MAP[top_class(probabilities)], 'probabilities': probabilities}
+            item['timings']['inference_ms'] = inference_ms
+            if cache is not None:
+                cache.put(item['key'], item['verdict'])
+    return scored
+
+def bulk_response(items, started, timings):
+    results = []
+    counts = {}
+    for item in items:
+        verdict = item['verdict']
+        if verdict is not None and item['error'] is None:
+            result = {'url': item['url'], **verdict_payload(verdict)}
+            result.setdefault('source', 'model')
+            outcome = verdict['result']
+        else:
+            result = {'url': item['url'], 'result': None, 'error': item['error'] or 'Not scored',
+                      'failed_stage': item['failed_stage']}
+            outcome = BULK_FAILURE_OUTCOMES.get(item['failed_stage'], 'error')
+        result['fetch'] = item['fetch']
+        result['timings'] = item['timings']
+        results.append(result)
+        metrics.REQUESTS.inc(outcome=outcome, source=result.get('source', 'model'), backend=BACKEND)
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    timings['total_ms'] = elapsed_ms(started)
+    metrics.observe("bulk_total", timings['total_ms'] / 1000.0, BACKEND)
+    metrics.BULK_ITEMS.observe(len(items))
+    return {'results': results, 'counts': counts, 'timings': timings}
+
+def begin_request():
+    return time.perf_counter(), metrics.start_request()
+
+def finish_request(request, url, outcome, source="model"):
+    # outcome: benign, phishing, fetch_error, not_ready or error; source: model, cache, reputation or url_model
+    started, timings = request
+    metrics.observe("total", time.perf_counter() - started, BACKEND)
+    metrics.REQUESTS.inc(outcome=outcome, source=source, backend=BACKEND)
+    if config.TIMING_LOG:
+        metrics.log_request(timings, url=url, outcome=outcome, source=source, backend=BACKEND)
+
+def _cache_value(name):
+    if cache is None:
+        return lambda: []
+    return lambda: [((), cache.stats()[name])]
+
+metrics.Gauge("antiphishing_model_ready", "1 once the model is loaded and warmed up.",
+              lambda: [((BACKEND,), int(_ready.is_set()))], labels=("backend",))
+metrics.Gauge("antiphishing_model_info", "Model backend and scoring settings.",
+              lambda: [((BACKEND, config.SCORING_WINDOWS, config.WINDOW_POOLING), 1)],
+              labels=("backend", "windows", "pooling"))
+metrics.Gauge("antiphishing_queue_depth", "Texts waiting for the batch scheduler.",
+              lambda: [((), scheduler.queue_depth())] if scheduler is not None else [])
+metrics.Gauge("antiphishing_cache_entries", "Verdicts in the cache.", _cache_value("size"))
+metrics.Gauge("antiphishing_cache_hits_total", "Verdict cache hits.", _cache_value("hits"), kind="counter")
+metrics.Gauge("antiphishing_cache_misses_total", "Verdict cache misses.", _cache_value("misses"), kind="counter")
+metrics.Gauge("antiphishing_cache_evictions_total", "Verdicts evicted from the full cache.", _cache_value("evictions"), kind="counter")
+
+def _reputation_value(name):
+    if reputation is None:
+        return lambda: []
+    return lambda: [((), reputation.stats()[name])]
+
+metrics.Gauge("antiphishing_reputation_allow_entries", "Hosts in the allow list.", _reputation_value("allow_entries"))
+metrics.Gauge("antiphishing_reputation_block_entries", "Hosts in the block list.", _reputation_value("block_entries"))
+metrics.Gauge("antiphishing_reputation_resolved_ratio", "Share of reputation lookups answered by the lists.",
+              _reputation_value("resolved_fraction"))
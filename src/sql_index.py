@@ -0,0 +1,32 @@
+import re
+
+# One row of the dataset's index.sql: (id, 'url', 'website', result, 'created_date'),
+# website being the saved .html file and result 1 for phishing, 0 for benign.
+RECORD_PATTERN = re.compile(
+    r"\(\s*([0-9]+)\s*,\s*'((?:\\'|[^'])*)'\s*,\s*'((?:\\'|[^'])*)'\s*,\s*([01])\s*,\s*'((?:\\'|[^'])*)'\s*\)"
+)
+
+_ESCAPES = re.compile(r"\\(.)")
+_ESCAPED = {"n": "\n", "r": "\r", "t": "\t", "0": "\0"}
+
+def unescape(value):
+    # MySQL dump string escapes (\', \\, \n, ...)
+    return _ESCAPES.sub(lambda match: _ESCAPED.get(match.group(1), match.group(1)), value)
+
+def iter_records(path, chunk_size=1 << 20, max_record=1 << 20):
+    # Streams the dump in chunks instead of reading it whole; a record cut by a chunk boundary
+    # is completed by the next chunk. Yields (id, url, website, result, created_date).
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        pending = ""
+        while True:
+            chunk = f.read(chunk_size)
+            buffer = pending + chunk
+            end = 0
+            for match in RECORD_PATTERN.finditer(buffer):
+                rec_id, url, website, result, created_date = match.groups()
+                yield int(rec_id), unescape(url), website.strip(), int(result), created_date
+                end = match.end()
+            if not chunk:
+                return
+            # Nothing after the last complete record can belong to an earlier one
+            pending = buffer[end:][-max_record:]
@@ -0,0 +1,76 @@
+import threading
+
+MAX_LENGTH = 128
+
+# Fast tokenizers change their truncation/padding settings on every call, and the Rust
+# side refuses ("Already borrowed") when another thread is encoding at the same time.
+_encode_lock = threading.Lock()
+
+def load_tokenizer(model_path, fast=True):
+    # The Rust tokenizer is converted from vocab.txt when the folder has no tokenizer.json.
+    # transformers is imported here, it is by far the slowest import of the service.
+    from transformers import MobileBertTokenizer, MobileBertTokenizerFast
+
+    tokenizer_class = MobileBertTokenizerFast if fast else MobileBertTokenizer
+    return tokenizer_class.from_pretrained(model_path)
+
+def encode_batch(tokenizer, texts, max_length=MAX_LENGTH, return_token_type_ids=False, return_tensors='pt', padding='max_length'):
+    # Same settings as the old per-text encode_plus calls, for a whole list at once.
+    # padding=False leaves the padding to a collator (training with dynamic padding).
+    with _encode_lock:
+        return tokenizer(
+            list(texts),
+            add_special_tokens=True,
+            max_length=max_length,
+            return_token_type_ids=return_token_type_ids,
+            padding=padding,
+            truncation=True,
+            return_attention_mask=True,
+            return_tensors=return_tensors
+        )
+
+def window_budget(windows, stride, max_length=MAX_LENGTH):
+    # Tokens of extracted text covered by the first `windows` windows; [CLS] and [SEP] take two
+    # positions of each window and consecutive windows share `stride` tokens
+    return max_length - 2 + (windows - 1) * (max_length - 2 - stride)
+
+def encode_windows(tokenizer, texts, windows, stride, max_length=MAX_LENGTH, return_tensors='pt', padding='max_length'):
+    # Overlapping max_length windows over each text instead of only its start, at most `windows`
+    # per text. Returns the encodings and, for every row, the index of the text it belongs to.
+    with _encode_lock:
+        encodings = tokenizer(
+            list(texts),
+            add_special_tokens=True,
+            max_length=max_length,
+            stride=stride,
+            return_overflowing_tokens=True,
+            return_token_type_ids=False,
+            padding=padding,
+            truncation=True,
+            return_attention_mask=True
+        )
+
+    rows = []
+    sample_index = []
+    for row, sample in enumerate(encodings["overflow_to_sample_mapping"]):
+        if sample_index[-windows:].count(sample) < windows:
+            rows.append(row)
+            sample_index.append(sample)
+
+    data = {key: [encodings[key][row] for row in rows] for key in ("input_ids", "attention_mask")}
+    if return_tensors is None:
+        return data, sample_index
+    from transformers import BatchEncoding
+    return BatchEncoding(data, tensor_type=return_tensors), sample_index
+
+def token_counter(tokenizer):
+    # Lines are joined with "\n", so the token count of the output is the sum over lines.
+    if not getattr(tokenizer, "is_fast", False):
+        return lambda line: len(tokenizer.tokenize(line))
+
+    # A private copy that is never reconfigured can be used from many threads at once
+    from tokenizers import Tokenizer
+    counter = Tokenizer.from_str(tokenizer.backend_tokenizer.to_str())
+    counter.no_truncation()
+    counter.no_padding()
+    return lambda line: len(counter.encode(line, add_special_tokens=False).ids)
@@ -0,0 +1,139 @@
+import json
+import time
+import argparse
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sql_index import iter_records
+from url_model import UrlModel, vectorize
+
+DEFAULT_SQL_FILE = "D://PTIT/Datn/Code/anti-phishing/dataset_for_prediction/index.sql"
+DEFAULT_OUTPUT = "D://PTIT/Datn/Code/anti-phishing/src/url_model.joblib"
+SEED = 42
+
+def load_urls(sql_file):
+    # One label per URL; URLs recorded with both labels are dropped
+    labels = {}
+    for _, url, _, result, _ in iter_records(sql_file):
+        url = url.strip()
+        if url:
+            labels[url] = result if labels.get(url, result) == result else None
+    pairs = [(url, label) for url, label in labels.items() if label is not None]
+    return [url for url, _ in pairs], np.array([label for _, label in pairs])
+
+def pick_thresholds(probabilities, labels, precision):
+    # benign_below: the widest low-probability range whose benign precision is >= precision;
+    # phishing_above: the widest high-probability range whose phishing precision is >= precision
+    order = np.argsort(probabilities, kind="stable")
+    p = probabilities[order]
+    y = labels[order]
+    n = len(p)
+
+    benign_precision = np.cumsum(y == 0) / np.arange(1, n + 1)
+    ok = np.flatnonzero(benign_precision >= precision)
+    benign_below = 0.0
+    if len(ok):
+        k = ok[-1]
+        benign_below = 1.0 if k == n - 1 else (p[k] + p[k + 1]) / 2
+
+    phishing_precision = (np.cumsum((y == 1)[::-1]) / np.arange(1, n + 1))[::-1]
+    ok = np.flatnonzero(phishing_precision >= precision)
+    phishing_above = 1.01
+    if len(ok):
+        j = ok[0]
+        phishing_above = 0.0 if j == 0 else (p[j - 1] + p[j]) / 2
+
+    if benign_below > phishing_above:
+        benign_below = phishing_above = (benign_below + phishing_above) / 2
+    return float(benign_below), float(phishing_above)
+
+def cascade_report(probabilities, labels, benign_below, phishing_above, url_ms, html_ms):
+    benign = probabilities < benign_below
+    phishing = probabilities >= phishing_above
+    decided = benign | phishing
+    correct = (benign & (labels == 0)) | (phishing & (labels == 1))
+    escalation = 1 - decided.mean()
+    # Every request pays for the URL stage, escalated ones for the fetch + MobileBERT stage too
+    cascade_ms = url_ms + escalation * html_ms
+    return {
+        "benign_below": benign_below,
+        "phishing_above": phishing_above,
+        "escalation_rate": float(escalation),
+        "decided": int(decided.sum()),
+        "decided_accuracy": float(correct.sum() / decided.sum()) if decided.any() else 0.0,
+        "missed_phishing": int((benign & (labels == 1)).sum()),
+        "false_alarms": int((phishing & (labels == 0)).sum()),
+        "cascade_ms": cascade_ms,
+        "latency_saved": 1 - cascade_ms / html_ms if html_ms else 0.0,
+    }
+
+def html_stage_ms(args):
+    if args.html_stage_ms is not None:
+        return args.html_stage_ms
+    if args.benchmark_results:
+        # check_url on the median page from benchmark_suite.py: fetch + extraction + model
+        with open(args.benchmark_results, "r", encoding="utf-8") as f:
+            return json.load(f)["results"]["check_url/median"]["mean_ms"]
+    return 500.0
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the URL-only first stage of the cascade from the dataset index.sql.')
+    parser.add_argument('--sql', default=DEFAULT_SQL_FILE)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--precision', type=float, nargs='+', default=[0.995, 0.99, 0.98, 0.95],
+                        help='Precision the URL stage must reach on the cases it answers; the first one is saved.')
+    parser.add_argument('--C', type=float, default=4.0, help='Inverse regularization strength.')
+    parser.add_argument('--html-stage-ms', type=float, help='Mean latency of the fetch + MobileBERT path.')
+    parser.add_argument('--benchmark-results', help='benchmark_suite.py JSON to take the HTML stage latency from.')
+    args = parser.parse_args()
+
+    urls, labels = load_urls(args.sql)
+    print(f"Loaded {len(urls)} URLs ({int(labels.sum())} phishing) from {args.sql}")
+
+    # 80 / 10 / 10: thresholds are picked on the validation part, the report uses the test part
+    train_urls, rest_urls, train_labels, rest_labels = train_test_split(
+        urls, labels, test_size=0.2, random_state=SEED, stratify=labels)
+    val_urls, test_urls, val_labels, test_labels = train_test_split(
+        rest_urls, rest_labels, test_size=0.5, random_state=SEED, stratify=rest_labels)
+
+    start = time.perf_counter()
+    classifier = LogisticRegression(C=args.C, solver="liblinear", max_iter=1000)
+    classifier.fit(vectorize(train_urls), train_labels)
+    print(f"Trained in {time.perf_counter() - start:.1f}s")
+
+    val_probabilities = classifier.predict_proba(vectorize(val_urls))[:, 1]
+    test_probabilities = classifier.predict_proba(vectorize(test_urls))[:, 1]
+
+    # Per-request cost of the URL stage, one URL at a time as the service calls it
+    model = UrlModel(classifier, 0.0, 1.01)
+    sample = test_urls[:1000]
+    start = time.perf_counter()
+    for url in sample:
+        model.decide(url)
+    url_ms = (time.perf_counter() - start) / len(sample) * 1000
+    html_ms = html_stage_ms(args)
+
+    print(f"\nTest set: {len(test_urls)} URLs, URL stage {url_ms:.2f} ms/request, HTML stage {html_ms:.0f} ms/request")
+    print(f"{'precision':>10}{'benign <':>10}{'phish >=':>10}{'escalated':>11}{'decided acc':>13}"
+          f"{'missed':>8}{'false alarms':>14}{'ms/request':>12}{'saved':>8}")
+    reports = []
+    for precision in args.precision:
+        benign_below, phishing_above = pick_thresholds(val_probabilities, val_labels, precision)
+        report = cascade_report(test_probabilities, test_labels, benign_below, phishing_above, url_ms, html_ms)
+        reports.append({"precision": precision, **report})
+        print(f"{precision:>10.3f}{benign_below:>10.3f}{phishing_above:>10.3f}{report['escalation_rate'] * 100:>10.1f}%"
+              f"{report['decided_accuracy'] * 100:>12.2f}%{report['missed_phishing']:>8}{report['false_alarms']:>14}"
+              f"{report['cascade_ms']:>12.1f}{report['latency_saved'] * 100:>7.1f}%")
+
+    chosen = reports[0]
+    model = UrlModel(classifier, chosen["benign_below"], chosen["phishing_above"], info={
+        "precision": chosen["precision"],
+        "trained_urls": len(train_urls),
+        "test_escalation_rate": chosen["escalation_rate"],
+        "test_decided_accuracy": chosen["decided_accuracy"],
+    })
+    model.save(args.output)
+    print(f"\nModel saved to: {args.output} (precision {chosen['precision']})")
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,16 @@ import pandas as pd
 import os
 import sys
 from sklearn.model_selection import train_test_split
-from transformers import MobileBertForSequenceClassification, MobileBertTokenizer, Trainer, TrainingArguments, EarlyStoppingCallback
-from datasets import Dataset
+from transformers import MobileBertForSequenceClassification, Trainer, TrainingArguments, EarlyStoppingCallback, DataCollatorWithPadding
 from sklearn.metrics import precision_recall_fscore_support, accuracy_score, confusion_matrix, roc_curve, auc
 from concurrent.futures import ThreadPoolExecutor
 import torch
 import numpy as np
 import matplotlib.pyplot as plt
+from tokenization import MAX_LENGTH, load_tokenizer, encode_batch
+from corpus import read_corpus
+from dataset_cache import load_or_tokenize, corpus_fingerprint
+from dedup import load_groups, assign_groups, group_train_test_split
 
 # Đọc dữ liệu đầu vào
 def read_text(filename, label):
@@ -33,62 +36,106 @@ def compute_metrics(eval_pred):
 
 # Kiểm tra tham số dòng lệnh
 if len(sys.argv) < 2:
-    print("Usage: script.py <test|full>")
+    print("Usage: script.py <test|full> [corpus_dir]")
     sys.exit(1)
 
 mode = sys.argv[1]
 print(f"Running in mode: {mode}")
 
-tokenizer = MobileBertTokenizer.from_pretrained("google/mobilebert-uncased")
-
-# Load các file dùng để huấn luyện
-phish_files = [f for f in os.listdir('D:/PTIT/Datn/Code/anti-phishing/data_for_training/phishing_samples') if f.endswith('.txt')]
-benign_files = [f for f in os.listdir('D:/PTIT/Datn/Code/anti-phishing/data_for_training/benign_samples') if f.endswith('.txt')]
-
-phishing = [(f, 1) for f in phish_files]
-benign = [(f, 0) for f in benign_files]
-
-data = phishing + benign
-df = pd.DataFrame(data, columns=['file', 'label'])
-
-def parallel_read(file_label):
-    return read_text(*file_label)
-
-print("Reading files...")
-with ThreadPoolExecutor(max_workers=8) as executor:
-    texts = list(executor.map(parallel_read, zip(df['file'], df['label'])))
-df['text'] = texts
+SPLIT_SEED = 42
+TOKENIZED_CACHE_DIR = os.environ.get("ANTIPHISHING_TOKENIZED_CACHE", "./tokenized_cache")
+# Chỉ mục trùng lặp do dedup.py tạo: group giữ mọi mẫu nhưng các mẫu trùng nhau luôn nằm cùng một phía
+# khi chia train/val/test, drop chỉ giữ một mẫu cho mỗi nhóm, off bỏ qua chỉ mục
+DEDUP_INDEX = os.environ.get("ANTIPHISHING_DEDUP_INDEX", "dedup_index.sqlite")
+DEDUP_MODE = os.environ.get("ANTIPHISHING_DEDUP", "group")
+
+tokenizer = load_tokenizer("google/mobilebert-uncased")
+
+def read_sample_folders():
+    # Load các file dùng để huấn luyện
+    phish_files = [f for f in os.listdir('D:/PTIT/Datn/Code/anti-phishing/data_for_training/phishing_samples') if f.endswith('.txt')]
+    benign_files = [f for f in os.listdir('D:/PTIT/Datn/Code/anti-phishing/data_for_training/benign_samples') if f.endswith('.txt')]
+
+    phishing = [(f, 1) for f in phish_files]
+    benign = [(f, 0) for f in benign_files]
+
+    data = phishing + benign
+    df = pd.DataFrame(data, columns=['file', 'label'])
+
+    def parallel_read(file_label):
+        return read_text(*file_label)
+
+    print("Reading files...")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        texts = list(executor.map(parallel_read, zip(df['file'], df['label'])))
+    df['text'] = texts
+    return df
+
+def read_corpus_shards(corpus_dir):
+    # Đọc trực tiếp các shard Parquet/Arrow (memory-mapped) thay vì hàng chục nghìn file .txt
+    print(f"Reading corpus shards from {corpus_dir}...")
+    table = read_corpus(corpus_dir, columns=['filename', 'label', 'text'])
+    df = table.to_pandas().rename(columns={'filename': 'file'})
+    df['label'] = df['label'].astype('int64')
+    return df
+
+if len(sys.argv) > 2:
+    df = read_corpus_shards(sys.argv[2])
+else:
+    df = read_sample_folders()
+
+grouped = DEDUP_MODE != "off" and os.path.exists(DEDUP_INDEX)
+if grouped:
+    df['group'] = assign_groups(df, load_groups(DEDUP_INDEX))
+    print(f"{len(df)} samples in {df['group'].nunique()} duplicate groups ({DEDUP_INDEX})")
+    if DEDUP_MODE == "drop":
+        df = df.drop_duplicates(['group', 'label'])
+        print(f"Kept one sample per group: {len(df)} samples")
 
 # Chọn 1000 mẫu ngẫu nhiên cho chế độ test
 if mode == "test":
-    df = df.sample(1000, random_state=42)
+    df = df.sample(1000, random_state=SPLIT_SEED)
 
 print(f"Total samples after processing: {len(df)}")
 
-# 1. Chia Train/Test (20% cho test)
-train_df, test_df = train_test_split(df, test_size=0.2, random_state=42, stratify=df['label'])
+if grouped:
+    # 1. Chia Train/Test (20% cho test), mỗi nhóm trùng lặp chỉ nằm ở một phía
+    train_df, test_df = group_train_test_split(df, 0.2, SPLIT_SEED, groups=df['group'], stratify=df['label'])
 
-# 2. Chia Train/Validation (Lấy 10% từ tập Train để làm Validation)
-train_df, val_df = train_test_split(train_df, test_size=0.1, random_state=42, stratify=train_df['label'])
+    # 2. Chia Train/Validation (Lấy 10% từ tập Train để làm Validation)
+    train_df, val_df = group_train_test_split(train_df, 0.1, SPLIT_SEED, groups=train_df['group'], stratify=train_df['label'])
+else:
+    # 1. Chia Train/Test (20% cho test)
+    train_df, test_df = train_test_split(df, test_size=0.2, random_state=SPLIT_SEED, stratify=df['label'])
 
-def tokenize_function(examples):
-    return tokenizer(examples["text"], padding="max_length", truncation=True, max_length=128)
+    # 2. Chia Train/Validation (Lấy 10% từ tập Train để làm Validation)
+    train_df, val_df = train_test_split(train_df, test_size=0.1, random_state=SPLIT_SEED, stratify=train_df['label'])
 
-# Convert pandas dataframe to HuggingFace Dataset
-train_dataset = Dataset.from_pandas(train_df)
-val_dataset = Dataset.from_pandas(val_df)
-test_dataset = Dataset.from_pandas(test_df)
+def tokenize_function(examples):
+    # Không pad ở đây: DataCollatorWithPadding pad theo mẫu dài nhất của từng batch
+    return encode_batch(tokenizer, examples["text"], return_token_type_ids=True, return_tensors=None, padding=False)
+
+# Tokenize datasets (hoặc nạp lại từ cache nếu tokenizer, max_length, seed và dữ liệu không đổi)
+tokenized = load_or_tokenize(
+    {'train': train_df, 'val': val_df, 'test': test_df},
+    tokenize_function,
+    tokenizer,
+    max_length=MAX_LENGTH,
+    seed=SPLIT_SEED,
+    corpus_hash=corpus_fingerprint(df, columns=("file", "label", "text", "group") if grouped else ("file", "label", "text")),
+    cache_dir=TOKENIZED_CACHE_DIR,
+    extra={'padding': 'dynamic'}
+)
+train_dataset = tokenized['train']
+val_dataset = tokenized['val']
+test_dataset = tokenized['test']
 
-# Tokenize datasets
-print("Tokenizing datasets...")
-train_dataset = train_dataset.map(tokenize_function, batched=True)
-val_dataset = val_dataset.map(tokenize_function, batched=True)
-test_dataset = test_dataset.map(tokenize_function, batched=True)
+# Only the model inputs; the collator turns them into padded tensors
+train_dataset.set_format(columns=['input_ids', 'token_type_ids', 'attention_mask', 'label'])
+val_dataset.set_format(columns=['input_ids', 'token_type_ids', 'attention_mask', 'label'])
+test_dataset.set_format(columns=['input_ids', 'token_type_ids', 'attention_mask', 'label'])
 
-# Set format for pytorch
-train_dataset.set_format(type='torch', columns=['input_ids', 'token_type_ids', 'attention_mask', 'label'])
-val_dataset.set_format(type='torch', columns=['input_ids', 'token_type_ids', 'attention_mask', 'label'])
-test_dataset.set_format(type='torch', columns=['input_ids', 'token_type_ids', 'attention_mask', 'label'])
+data_collator = DataCollatorWithPadding(tokenizer)
 
 # Model setup
 model = MobileBertForSequenceClassification.from_pretrained("google/mobilebert-uncased", num_labels=2)
@@ -114,6 +161,7 @@ trainer = Trainer(
     args=args,
     train_dataset=train_dataset,
     eval_dataset=val_dataset,
+    data_collator=data_collator,
     compute_metrics=compute_metrics,
     callbacks=[EarlyStoppingCallback(early_stopping_patience=2)]
 )
@@ -0,0 +1,154 @@
+import re
+import math
+from collections import Counter
+from urllib.parse import urlsplit, unquote
+
+# First stage of the cascade: a linear model on features of the URL string alone. Confident
+# answers skip the page fetch and MobileBERT; the rest are escalated to the HTML model.
+
+FEATURE_VERSION = 1
+N_FEATURES = 1 << 18
+
+SUSPICIOUS_WORDS = ("login", "signin", "sign-in", "logon", "verify", "verification", "account", "update",
+                    "secure", "security", "confirm", "password", "banking", "bank", "wallet", "webscr",
+                    "support", "unlock", "suspend", "billing", "invoice", "payment", "recover")
+SHORTENERS = {"bit.ly", "goo.gl", "tinyurl.com", "t.co", "ow.ly", "is.gd", "buff.ly", "cutt.ly", "rb.gy", "shorturl.at"}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def entropy(text):
+    if not text:
+        return 0.0
+    counts = Counter(text)
+    total = len(text)
+    return -sum(count / total * math.log2(count / total) for count in counts.values())
+
+def is_ip_literal(host):
+    # Dotted, integer, hex and IPv6 forms all parse (http://3232235777/ is 192.168.1.1)
+    from IPy import IP
+    if not host or not (host[0].isdigit() or ":" in host or host.startswith("0x")):
+        return False
+    try:
+        IP(int(host, 16) if host.startswith("0x") else host)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+def url_features(url):
+    # Feature dict for sklearn's FeatureHasher: lengths and counts on a log scale, flags,
+    # the TLD, and the lowercase tokens of the host and of the path/query
+    raw = url.strip()
+    try:
+        parts = urlsplit(raw if "//" in raw else f"http://{raw}")
+        scheme, path, query = parts.scheme, unquote(parts.path or ""), parts.query or ""
+        host = (parts.hostname or "").rstrip(".")
+        port = parts.port
+    except ValueError:
+        # Unparsable ("http://[abc", port out of range): only the raw string features are left
+        scheme, host, port, path, query = "", "", None, "", ""
+    labels = [label for label in host.split(".") if label]
+    ip_host = is_ip_literal(host)
+    tld = labels[-1] if labels and not ip_host else ""
+    lowered = raw.lower()
+
+    features = {
+        "url_length": math.log1p(len(raw)),
+        "host_length": math.log1p(len(host)),
+        "path_length": math.log1p(len(path)),
+        "query_length": math.log1p(len(query)),
+        "path_depth": min(len([segment for segment in path.split("/") if segment]), 10) / 10.0,
+        "subdomains": min(max(len(labels) - 2, 0), 6) / 6.0,
+        "host_entropy": entropy(host) / 5.0,
+        "url_entropy": entropy(lowered) / 6.0,
+        "host_digits": sum(ch.isdigit() for ch in host) / len(host) if host else 0.0,
+        "host_hyphens": min(host.count("-"), 5) / 5.0,
+        "dots": min(raw.count("."), 10) / 10.0,
+        "at_sign": float("@" in raw),
+        "double_slash_path": float("//" in path),
+        "percent_escapes": min(raw.count("%"), 10) / 10.0,
+        "query_params": min(query.count("&") + (1 if query else 0), 10) / 10.0,
+        "https": float(scheme == "https"),
+        "explicit_port": float(port is not None and port not in (80, 443)),
+        "ip_host": float(ip_host),
+        "punycode": float("xn--" in host),
+        "shortener": float(host in SHORTENERS),
+        "php": float(path.endswith(".php")),
+        f"tld={tld}": 1.0,
+    }
+    for word in SUSPICIOUS_WORDS:
+        if word in lowered:
+            features[f"word={word}"] = 1.0
+    for token in _TOKEN.findall(host.lower()):
+        features[f"host_token={token}"] = 1.0
+    for token in _TOKEN.findall((path + "?" + query).lower()):
+        if len(token) > 1:
+            features[f"path_token={token}"] = 1.0
+    return features
+
+def hash_features(feature_dicts):
+    from sklearn.feature_extraction import FeatureHasher
+    hasher = FeatureHasher(n_features=N_FEATURES, input_type="dict", alternate_sign=False)
+    return hasher.transform(feature_dicts)
+
+def vectorize(urls):
+    return hash_features(url_features(url) for url in urls)
+
+class UrlModel:
+    # benign_below/phishing_above are phishing-probability thresholds chosen on validation data;
+    # anything in between is escalated
+
+    def __init__(self, classifier, benign_below, phishing_above, info=None):
+        self.classifier = classifier
+        self.benign_below = benign_below
+        self.phishing_above = phishing_above
+        self.info = info or {}
+
+    def phishing_probability(self, urls):
+        return self.classifier.predict_proba(vectorize(urls))[:, 1]
+
+    def decide(self, url):
+        return self.decide_many([url])[0]
+
+    def decide_many(self, urls):
+        # (label or None when escalated, phishing probability) per URL, in one predict_proba call.
+        # A URL whose features cannot be computed is escalated with probability None, the others
+        # are still decided.
+        features = []
+        for url in urls:
+            try:
+                features.append(url_features(url))
+            except (ValueError, TypeError, AttributeError) as e:
+                print(f"Error computing URL features for {url!r}: {type(e).__name__}: {e}")
+                features.append(None)
+        scored = [index for index, feature_dict in enumerate(features) if feature_dict is not None]
+        decisions = [(None, None)] * len(urls)
+        if not scored:
+            return decisions
+        probabilities = self.classifier.predict_proba(hash_features(features[index] for index in scored))[:, 1]
+        for index, probability in zip(scored, probabilities.tolist()):
+            if probability < self.benign_below:
+                decisions[index] = (0, probability)
+            elif probability >= self.phishing_above:
+                decisions[index] = (1, probability)
+            else:
+                decisions[index] = (None, probability)
+        return decisions
+
+    def save(self, path):
+        import joblib
+        joblib.dump({
+            "feature_version": FEATURE_VERSION,
+            "classifier": self.classifier,
+            "benign_below": self.benign_below,
+            "phishing_above": self.phishing_above,
+            "info": self.info,
+        }, path)
+
+    @classmethod
+    def load(cls, path):
+        import joblib
+        data = joblib.load(path)
+        if data.get("feature_version") != FEATURE_VERSION:
+            raise ValueError(f"{path} was trained with URL features v{data.get('feature_version')}, "
+                             f"this code computes v{FEATURE_VERSION}; retrain it with train_url_model.py")
+        return cls(data["classifier"], data["benign_below"], data["phishing_above"], data.get("info"))
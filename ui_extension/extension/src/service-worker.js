@@ -5,6 +5,10 @@ import { whitelist } from './whitelist.js';
 const urlCheckResults = {};
 /** @type {Map<string,boolean>} */
 const whitelistMap = new Map();
+/** Pages longer than this are cut before being sent to the server */
+const MAX_PAGE_HTML_LENGTH = 2 * 1024 * 1024;
+/** How long to wait for the tab to finish loading before letting the server fetch the page */
+const PAGE_LOAD_TIMEOUT_MS = 10 * 1000;
 
 class PhishResult {
 	/**
@@ -84,7 +88,8 @@ chrome.webRequest.onCompleted.addListener(
 
 		await logGroupEventAsync(`event-oncompleted-freephish-scan:${url}`, async () => {
 			try {
-				const response = await getFreePhishCheckUrl(url);
+				const pageHtml = await capturePageHtml(tabId, url);
+				const response = await getFreePhishCheckUrl(url, pageHtml);
 				const data = await response.json();
 				const nowSeconds = Date.now();
 				const nowDate = new Date(nowSeconds);
@@ -153,11 +158,108 @@ async function getPagePhishing() {
 	})
 }
 
+/**
+ * Resolves once the top frame of the tab has finished loading, or after the timeout.
+ *
+ * @param {number} tabId
+ * @returns {Promise<boolean>} whether the load completed
+ */
+function waitForPageLoad(tabId) {
+	return new Promise((resolve) => {
+		const finish = (loaded) => {
+			clearTimeout(timer);
+			chrome.tabs.onUpdated.removeListener(onUpdated);
+			resolve(loaded);
+		};
+		const onUpdated = (updatedTabId, changeInfo) => {
+			if (updatedTabId === tabId && changeInfo.status === 'complete') {
+				finish(true);
+			}
+		};
+		const timer = setTimeout(() => finish(false), PAGE_LOAD_TIMEOUT_MS);
+		// Listen before reading the status so a load finishing in between is not missed
+		chrome.tabs.onUpdated.addListener(onUpdated);
+		chrome.tabs.get(tabId).then((tab) => {
+			if (tab.status === 'complete') {
+				finish(true);
+			}
+		}, () => finish(false));
+	})
+}
+
+/**
+ * @param {string} href
+ * @returns {string} the URL without its fragment
+ */
+function withoutHash(href) {
+	const url = new URL(href);
+	url.hash = '';
+	return url.href
+}
+
+/**
+ * Reads the rendered document from the tab so the server does not download the page again.
+ * The response for the main frame completes before the tab commits and parses it, so this
+ * waits for the load and only returns the HTML when the tab still shows the checked URL.
+ *
+ * @param {number} tabId
+ * @param {URL} url
+ * @returns {Promise<string|null>}
+ */
+async function capturePageHtml(tabId, url) {
+	try {
+		if (!await waitForPageLoad(tabId)) {
+			return null
+		}
+		const [injection] = await chrome.scripting.executeScript({
+			target: { tabId: tabId },
+			func: () => ({ url: document.URL, html: document.documentElement.outerHTML }),
+		});
+		const page = injection?.result;
+		if (!page || typeof page.html !== 'string' || page.html === '') {
+			return null
+		}
+		if (withoutHash(page.url) !== withoutHash(url.href)) {
+			return null
+		}
+		return page.html.slice(0, MAX_PAGE_HTML_LENGTH)
+	}
+	catch (e) {
+		console.error(e);
+		return null
+	}
+}
+
+/**
+ * @param {string} text
+ * @returns {Promise<string>} base64 of the gzip-compressed UTF-8 text
+ */
+async function gzipBase64(text) {
+	const stream = new Blob([text]).stream().pipeThrough(new CompressionStream('gzip'));
+	const bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+	let binary = '';
+	for (let i = 0; i < bytes.length; i += 0x8000) {
+		binary += String.fromCharCode(...bytes.subarray(i, i + 0x8000));
+	}
+	return btoa(binary)
+}
+
 /**
  * @param {URL} url
+ * @param {string|null} [pageHtml] captured document; without it the server fetches the page itself
  * @returns {Promise<Response>}
  */
-async function getFreePhishCheckUrl(url) {
+async function getFreePhishCheckUrl(url, pageHtml = null) {
+	const body = { url: url.href };
+	if (pageHtml) {
+		try {
+			body.html_gzip = await gzipBase64(pageHtml);
+		}
+		catch (e) {
+			console.error(e);
+			body.html = pageHtml;
+		}
+	}
 
 	return await fetch('http://localhost:5024/check_url', {
 
@@ -165,7 +267,7 @@ async function getFreePhishCheckUrl(url) {
 		headers: {
 			'Content-Type': 'application/json',
 		},
-		body: JSON.stringify({ url: url.href }),
+		body: JSON.stringify(body),
 	})
 }
 